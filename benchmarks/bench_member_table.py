@@ -0,0 +1,122 @@
+"""Memory and lookup cost: the old per-user dicts vs utils.member_table.
+
+Run from the repo root:  python -m benchmarks.bench_member_table [n ...]
+
+"dicts" is the Levels state before MemberTable: ``{uid: xp}``,
+``{uid: datetime}`` and ``{uid: [role names]}``, filled the way
+``load_data`` filled them from store rows, plus the rank index it kept
+beside them (its own ``{uid: xp}`` and a ``(-xp, uid)`` tuple per user).
+"table" is a MemberTable with the RankIndex that reads from it. Memory
+includes the index; its share is also printed on its own. Memory is what is still
+allocated after loading the rows and dropping them, so it counts the
+per-user int, datetime and list objects each layout keeps alive. Every
+user has XP, ~70% have claimed /daily and ~40% hold milestone roles.
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from utils.member_table import MemberTable
+from utils.ranking import RankIndex
+
+ROLE_NAMES = ["Novice Voidwalker", "Abyssal Explorer", "Eclipse Seeker", "Celestial Adept",
+              "Void Master", "Eternal Shadow", "Abyssal Lord", "Cosmic Overlord"]
+
+
+def rows(n, seed):
+    """Store-shaped rows: (uid, xp, iso daily or None, [role names])."""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    for _ in range(n):
+        uid = rng.randrange(10**17, 10**18)
+        daily = (base + timedelta(seconds=rng.randrange(86400 * 300))).isoformat() if rng.random() < 0.7 else None
+        roles = ROLE_NAMES[:rng.randint(1, 4)] if rng.random() < 0.4 else []
+        yield uid, rng.randrange(0, 500_000, 10), daily, roles
+
+
+def build_dicts(data):
+    user_xp, last_daily, user_roles = {}, {}, {}
+    for uid, xp, daily, roles in data:
+        user_xp[uid] = xp
+        if daily:
+            last_daily[uid] = datetime.fromisoformat(daily)
+        if roles:
+            user_roles[uid] = list(roles)
+    return user_xp, last_daily, user_roles
+
+
+def build_dict_index(state):
+    """The old RankIndex's own ``{uid: xp}`` and ``(-xp, uid)`` keys."""
+    index_xp = dict(state[0])
+    return index_xp, sorted((-xp, uid) for uid, xp in index_xp.items())
+
+
+def build_table(data):
+    bits = {name: 1 << i for i, name in enumerate(ROLE_NAMES)}
+    table = MemberTable()
+    for uid, xp, daily, roles in data:
+        table.set_xp(uid, xp)
+        if daily:
+            table.set_daily(uid, datetime.fromisoformat(daily).timestamp())
+        mask = 0
+        for name in roles:
+            mask |= bits[name]
+        if mask:
+            table.add_roles(uid, mask)
+    return table
+
+
+def measure(build, build_index, n):
+    """Bytes held by the state and, separately, by its rank index."""
+    gc.collect()
+    tracemalloc.start()
+    data = list(rows(n, n))
+    obj = build(data)
+    del data
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    index = build_index(obj)
+    gc.collect()
+    total, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, index, total, total - size
+
+
+def timed(fn, probes):
+    start = time.perf_counter()
+    for uid in probes:
+        fn(uid)
+    return (time.perf_counter() - start) / len(probes) * 1e9
+
+
+def run(n):
+    rng = random.Random(n)
+    (user_xp, last_daily, user_roles), _, dict_bytes, dict_index = measure(build_dicts, build_dict_index, n)
+    table, _, table_bytes, table_index = measure(build_table, RankIndex, n)
+    uids = list(user_xp)
+    probes = [rng.choice(uids) for _ in range(200_000)]
+
+    print(f"{n:,} users")
+    print(f"  memory       dicts {dict_bytes / n:6.0f} B/user   table {table_bytes / n:6.0f} B/user"
+          f"   ({dict_bytes / table_bytes:.1f}x smaller)")
+    print(f"    rank index dicts {dict_index / n:6.0f} B/user   table {table_index / n:6.0f} B/user")
+    print(f"  xp lookup    dicts {timed(lambda u: user_xp.get(u, 0), probes):6.0f} ns        "
+          f"table {timed(table.get_xp, probes):6.0f} ns")
+    print(f"  daily lookup dicts {timed(last_daily.get, probes):6.0f} ns        "
+          f"table {timed(table.get_daily, probes):6.0f} ns")
+    print(f"  role check   dicts {timed(lambda u: 'Void Master' in user_roles.get(u, ()), probes):6.0f} ns        "
+          f"table {timed(lambda u: table.get_roles(u) >> 4 & 1, probes):6.0f} ns")
+
+    def dict_add(uid):
+        user_xp[uid] = user_xp.get(uid, 0) + 10
+
+    print(f"  xp add       dicts {timed(dict_add, probes):6.0f} ns        "
+          f"table {timed(lambda u: table.add_xp(u, 10), probes):6.0f} ns")
+
+
+if __name__ == "__main__":
+    for n in (int(a) for a in sys.argv[1:]) if len(sys.argv) > 1 else (100_000, 1_000_000):
+        run(n)
@@ -0,0 +1,269 @@
+"""End-to-end cog benchmark on stub Discord objects (see benchmarks/harness.py).
+
+Run from the repo root:
+
+    python -m benchmarks.bench_offline [--messages N] [--latency MS] [--rate-limit P]
+    python -m benchmarks.bench_offline --write-baseline offline.json
+    python -m benchmarks.bench_offline --baseline offline.json   # exit 1 on regression
+
+Scenarios, each on a fresh bot in a scratch directory:
+
+* messages -- a stream across three guilds through the real pipeline
+  (flood, word filter, XP, command dispatch), ~2% abusive
+* joins    -- a join burst in one guild (coalesced welcome collage, raid
+  detection) followed by steady single joins
+* commands -- the /level, /leaderboard, /daily, /warnings and /warn handlers
+
+Reported: throughput, handler latency percentiles, REST calls, SQLite
+writes per message and peak Python memory (tracemalloc, so timings carry
+its overhead; compare runs against each other, not against production).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.harness import FakeRest, Guild, Interaction, Message, build_bot, settle
+from utils.flood import FloodDetector
+from utils.metrics import TimingStats, registry
+
+FILLER = ("the quick brown fox jumps over the lazy dog while everyone in the server "
+          "talks about games music memes and homework").split()
+ABUSE = ["f.u.c.k", "sh!t", "b1tch", "a$$hole"]
+MODERATOR_ROLE = "｜Void Sentinels"
+
+# how much worse than the baseline a metric may get before --baseline fails
+TOLERANCE = {"throughput": 0.7, "p99_ms": 1.5, "writes_per_msg": 1.2, "peak_mb": 1.3}
+
+
+def summary(stats: TimingStats) -> dict:
+    p50, p95, p99 = stats.percentiles(0.5, 0.95, 0.99)
+    return {"p50_ms": p50 * 1000, "p95_ms": p95 * 1000, "p99_ms": p99 * 1000}
+
+
+class Scenario:
+    """Fresh bot + fake REST, with the store's writes counted."""
+
+    def __init__(self, args, flood: FloodDetector | None = None):
+        self.args = args
+        self.flood = flood
+        self.rest = FakeRest(latency=args.latency / 1000, jitter=args.latency / 4000,
+                             rate_limit=args.rate_limit, seed=args.seed)
+        self.writes = 0
+        self.rows = 0
+
+    async def __aenter__(self):
+        registry.__init__()
+        tracemalloc.start()
+        await self.rest.start()
+        self.bot = await build_bot(self.flood)
+        store = self.bot.get_cog("Levels").store
+        write_batch = store.write_batch
+
+        def counted(rows, *args):
+            self.writes += 1
+            self.rows += len(rows)
+            return write_batch(rows, *args)
+
+        store.write_batch = counted
+        self.guilds = [Guild(self.rest, f"guild{i}", self.bot) for i in range(3)]
+        return self
+
+    async def __aexit__(self, *exc):
+        for ext in list(self.bot.extensions):
+            await self.bot.unload_extension(ext)
+        await self.rest.close()
+        _, self.peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    async def settle(self):
+        await settle(self.bot)
+        await self.bot.get_cog("Levels").writer.flush()
+
+
+async def run_messages(args) -> dict:
+    rng = random.Random(args.seed)
+    # flood limits off: this measures the per-message cost, not the drop path
+    flood = FloodDetector(user_limit=10**9, guild_limit=10**9)
+    async with Scenario(args, flood) as sc:
+        members = [[g.add_member() for _ in range(args.users)] for g in sc.guilds]
+        latency = TimingStats()
+        tasks = []
+
+        async def one(message):
+            start = time.perf_counter()
+            await sc.bot.pipeline.process(message)
+            latency.add(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        per_tick = max(1, args.rate // 100)
+        for i in range(args.messages):
+            g = rng.randrange(len(sc.guilds))
+            words = [rng.choice(FILLER) for _ in range(rng.randint(3, 20))]
+            if rng.random() < 0.02:
+                words.insert(rng.randrange(len(words) + 1), rng.choice(ABUSE))
+            msg = Message(sc.guilds[g].text_channels[0], rng.choice(members[g]), " ".join(words))
+            tasks.append(asyncio.create_task(one(msg)))
+            if (i + 1) % per_tick == 0:
+                await asyncio.sleep(0.01)
+        await asyncio.gather(*tasks)
+        await sc.settle()
+        elapsed = time.perf_counter() - start
+
+    return {
+        "throughput": args.messages / elapsed,
+        **summary(latency),
+        "writes_per_msg": sc.writes / args.messages,
+        "rows_per_msg": sc.rows / args.messages,
+        "rest_calls": sum(sc.rest.calls.values()),
+        "throttled": sum(sc.rest.throttled.values()),
+        "stopped": registry.counters.get("pipeline.stopped.moderation", 0),
+        "peak_mb": sc.peak / 2**20,
+    }
+
+
+async def run_joins(args) -> dict:
+    async with Scenario(args, FloodDetector.from_env()) as sc:
+        guild = sc.guilds[0]
+        start = time.perf_counter()
+        for _ in range(args.burst):
+            sc.bot.dispatch("member_join", guild.add_member())
+        await sc.settle()
+        burst_s = time.perf_counter() - start
+
+        # quiet traffic afterwards: one join at a time, outside the burst window
+        single = TimingStats()
+        for _ in range(args.joins):
+            member = sc.guilds[1].add_member()
+            t0 = time.perf_counter()
+            await sc.bot.get_cog("Welcome").welcome_member(member)
+            await sc.settle()
+            single.add(time.perf_counter() - t0)
+
+    return {
+        "throughput": (args.burst + args.joins) / (burst_s + single.total),
+        "burst_s": burst_s,
+        **summary(single),
+        "welcome_sends": sc.rest.calls["channel.send"],
+        "avatar_fetches": sc.rest.calls["cdn.avatar"],
+        "raid_mode": sc.bot.flood.degraded(guild.id),
+        "peak_mb": sc.peak / 2**20,
+    }
+
+
+async def run_commands(args) -> dict:
+    rng = random.Random(args.seed)
+    async with Scenario(args) as sc:
+        guild = sc.guilds[0]
+        members = [guild.add_member() for _ in range(args.users)]
+        levels = sc.bot.get_cog("Levels")
+        moderation = sc.bot.get_cog("Moderation")
+        for m in members:
+            levels._add_xp(guild.id, m.id, rng.randint(0, 5000))
+        mod = guild.add_member("moderator")
+        mod.roles.append(type("Role", (), {"name": MODERATOR_ROLE, "id": 1})())
+        channel = guild.text_channels[0]
+
+        handlers = {
+            "level": lambda m: levels.level_slash.callback(levels, Interaction(m, channel), None),
+            "leaderboard": lambda m: levels.leaderboard_slash.callback(levels, Interaction(m, channel), rng.randint(1, 5)),
+            "daily": lambda m: levels.daily_slash.callback(levels, Interaction(m, channel)),
+            "warnings": lambda m: moderation.warnings_slash.callback(moderation, Interaction(m, channel), m),
+            "warn": lambda m: moderation.warn_slash.callback(moderation, Interaction(mod, channel), m, reason="bench"),
+        }
+        stats = {name: TimingStats() for name in handlers}
+
+        async def one(name, member):
+            t0 = time.perf_counter()
+            await handlers[name](member)
+            stats[name].add(time.perf_counter() - t0)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(name, rng.choice(members)) for name in handlers for _ in range(args.commands)))
+        await sc.settle()
+        elapsed = time.perf_counter() - start
+
+    total = len(handlers) * args.commands
+    merged = TimingStats()
+    for s in stats.values():
+        for v in s.samples:
+            merged.add(v)
+    return {
+        "throughput": total / elapsed,
+        **summary(merged),
+        **{f"{name}_p99_ms": s.percentiles(0.99)[0] * 1000 for name, s in stats.items()},
+        "peak_mb": sc.peak / 2**20,
+    }
+
+
+SCENARIOS = {"messages": run_messages, "joins": run_joins, "commands": run_commands}
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    failures = []
+    for scenario, metrics in results.items():
+        base = baseline.get(scenario, {})
+        for key, factor in TOLERANCE.items():
+            if key not in metrics or not base.get(key):
+                continue
+            value, ref = metrics[key], base[key]
+            worse = value < ref * factor if key == "throughput" else value > ref * factor
+            if worse:
+                failures.append(f"{scenario}.{key}: {value:.3f} vs baseline {ref:.3f}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rate", type=int, default=2000, help="message arrivals per second")
+    parser.add_argument("--users", type=int, default=300, help="members per guild")
+    parser.add_argument("--burst", type=int, default=40, help="joins in the burst")
+    parser.add_argument("--joins", type=int, default=10, help="single joins after the burst")
+    parser.add_argument("--commands", type=int, default=50, help="calls per slash command")
+    parser.add_argument("--latency", type=float, default=40.0, help="fake REST latency (ms)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="probability of a 429 per call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", choices=sorted(SCENARIOS))
+    parser.add_argument("--baseline", help="compare with this JSON and exit 1 on regression")
+    parser.add_argument("--write-baseline", help="save the results as a baseline JSON")
+    args = parser.parse_args(argv)
+
+    repo = os.getcwd()
+    baseline = None
+    if args.baseline:
+        with open(os.path.join(repo, args.baseline)) as f:
+            baseline = json.load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)  # levels.db, warnings.db, guild_config.json land here
+        try:
+            for name, run in SCENARIOS.items():
+                if args.only and name != args.only:
+                    continue
+                results[name] = asyncio.run(run(args))
+                print(name)
+                for key, value in results[name].items():
+                    print(f"  {key:<20} {value:10.3f}" if isinstance(value, float) else f"  {key:<20} {value!s:>10}")
+        finally:
+            os.chdir(repo)
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None:
+        failures = compare(results, baseline)
+        for line in failures:
+            print(f"REGRESSION {line}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Compare the old sort-per-call ranking with utils.ranking.RankIndex.
+
+Run from the repo root:  python -m benchmarks.bench_rank_index [n ...]
+"""
+import random
+import sys
+import time
+
+from utils.member_table import MemberTable
+from utils.ranking import RankIndex
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(n, queries=200):
+    rng = random.Random(n)
+    user_xp = {uid: rng.randrange(0, 500_000, 10) for uid in range(n)}
+    probes = [rng.randrange(n) for _ in range(queries)]
+
+    table = MemberTable()
+    for uid, xp in user_xp.items():
+        table.set_xp(uid, xp)
+    start = time.perf_counter()
+    index = RankIndex(table)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def sort_rank():
+        uid = rng.choice(probes)
+        sorted_users = sorted(user_xp.items(), key=lambda x: x[1], reverse=True)
+        return next(i for i, (u, _) in enumerate(sorted_users, start=1) if u == uid)
+
+    def sort_top10():
+        return sorted(user_xp.items(), key=lambda x: x[1], reverse=True)[:10]
+
+    def index_update():
+        uid = rng.randrange(n)
+        user_xp[uid] += 10
+        index.moved(uid, table.add_xp(uid, 10) - 10)
+
+    print(f"n={n:,}  (index build {build_ms:.0f} ms)")
+    print(f"  sorted() rank      {timed(sort_rank, 3):10.3f} ms/op")
+    print(f"  sorted() top 10    {timed(sort_top10, 3):10.3f} ms/op")
+    print(f"  index.rank         {timed(lambda: index.rank(rng.choice(probes)), queries) * 1000:10.3f} us/op")
+    print(f"  index.page(0, 10)  {timed(lambda: index.page(0, 10), queries) * 1000:10.3f} us/op")
+    print(f"  index.page(n/2,10) {timed(lambda: index.page(n // 2, 10), queries) * 1000:10.3f} us/op")
+    print(f"  index.update       {timed(index_update, queries * 50) * 1000:10.3f} us/op")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        run(size)
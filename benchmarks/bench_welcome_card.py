@@ -0,0 +1,105 @@
+"""Per-card render time: original inline pipeline vs utils.welcome_card.
+
+Run from the repo root:  python -m benchmarks.bench_welcome_card [cards]
+
+"before" re-decodes the banner, reloads both fonts, rebuilds the avatar
+ring/mask and draws the text gradient one column at a time, as the
+Welcome cog used to. "after" uses the template cache and the ramp-based
+gradient. Drawing is timed on its own and with the (identical) PNG
+encode included, since the encode dominates the end-to-end number.
+"""
+import io
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from utils.welcome_card import (
+    BANNER_PATH, FONT_PATH, compose_card, fit_avatar, load_template, measure_text, render_card,
+)
+
+
+def legacy_gradient_text(base_img, pos, text, font, left_color, right_color, shadow=2):
+    draw_base = ImageDraw.Draw(base_img)
+    w, h = measure_text(draw_base, text, font)
+    if w <= 0 or h <= 0:
+        return
+    x, y = pos
+    if shadow:
+        draw_base.text((x + shadow, y + shadow), text, font=font, fill="black")
+    mask = Image.new("L", (w, h), 0)
+    ImageDraw.Draw(mask).text((0, 0), text, font=font, fill=255)
+    grad = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    grad_draw = ImageDraw.Draw(grad)
+    for i in range(w):
+        t = i / (w - 1) if w > 1 else 0
+        r = int(left_color[0] * (1 - t) + right_color[0] * t)
+        g = int(left_color[1] * (1 - t) + right_color[1] * t)
+        b = int(left_color[2] * (1 - t) + right_color[2] * t)
+        grad_draw.line([(i, 0), (i, h)], fill=(r, g, b, 255))
+    base_img.paste(grad, (x, y), mask)
+
+
+def legacy_compose(avatar_bytes, display_name, guild_name, member_count):
+    background = Image.open(BANNER_PATH).convert("RGBA")
+    W, H = background.size
+    avatar = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
+    avatar_size = int(H * 0.6)
+    avatar = ImageOps.fit(avatar, (avatar_size, avatar_size), Image.LANCZOS)
+    mask = Image.new("L", avatar.size, 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, avatar_size, avatar_size), fill=255)
+    border = max(4, int(H * 0.02))
+    bordered = Image.new("RGBA", (avatar_size + 2 * border, avatar_size + 2 * border), (0, 0, 0, 0))
+    ImageDraw.Draw(bordered).ellipse((0, 0, bordered.size[0] - 1, bordered.size[1] - 1), fill=(255, 255, 255, 255))
+    bordered.paste(avatar, (border, border), mask)
+    avatar_x = int(W * 0.04)
+    avatar_y = (H - bordered.size[1]) // 2
+    background.paste(bordered, (avatar_x, avatar_y), bordered)
+    font_big = ImageFont.truetype(FONT_PATH, int(H * 0.14))
+    font_small = ImageFont.truetype(FONT_PATH, int(H * 0.07))
+    draw = ImageDraw.Draw(background)
+    main_text = f"HEY @{display_name.upper()}!"
+    subtext = f"WELCOME TO {guild_name.upper()} | YOU ARE OUR {member_count}TH MEMBER!"
+    text_x = avatar_x + bordered.size[0] + int(W * 0.05)
+    main_w, main_h = measure_text(draw, main_text, font_big)
+    text_y = avatar_y + bordered.size[1] // 2 - main_h // 2 - int(H * 0.04)
+    subtext_y = text_y + main_h + int(H * 0.03)
+    legacy_gradient_text(background, (text_x, text_y), main_text, font_big, (0, 220, 220), (255, 255, 255), 3)
+    legacy_gradient_text(background, (text_x, subtext_y), subtext, font_small, (0, 220, 220), (255, 255, 255), 2)
+    return background
+
+
+def legacy_render(*args):
+    buf = io.BytesIO()
+    legacy_compose(*args).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def timed(label, fn, args, cards):
+    fn(*args)  # warm-up (and template build for the cached path)
+    start = time.perf_counter()
+    for _ in range(cards):
+        fn(*args)
+    per_card = (time.perf_counter() - start) / cards * 1000
+    print(f"  {label:<22} {per_card:8.2f} ms/card")
+    return per_card
+
+
+def run(cards):
+    buf = io.BytesIO()
+    Image.new("RGB", (256, 256), (120, 40, 200)).save(buf, "PNG")
+    args = (buf.getvalue(), "Some Very Long Display Name", "The Void Server", 1234)
+
+    start = time.perf_counter()
+    load_template()
+    print(f"template build (once per asset change): {(time.perf_counter() - start) * 1000:.1f} ms")
+    before = timed("before, draw only", legacy_compose, args, cards)
+    after = timed("after, draw only", lambda data, *rest: compose_card(fit_avatar(data), *rest), args, cards)
+    print(f"  {'speedup':<22} {before / after:8.2f}x")
+    before = timed("before, draw + PNG", legacy_render, args, cards)
+    after = timed("after, draw + PNG", lambda data, *rest: render_card(fit_avatar(data), *rest), args, cards)
+    print(f"  {'speedup':<22} {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,44 @@
+"""Encode time and payload size of a welcome card per output format.
+
+Run from the repo root:  python -m benchmarks.bench_welcome_encoding [repeats]
+
+Uses the shipped BANNER2.jpg with a synthetic avatar and the real fonts.
+"""
+import io
+import sys
+import time
+
+from PIL import Image
+
+from utils.welcome_card import EncodeOptions, compose_card, encode_card, fit_avatar
+
+CASES = [
+    ("png (current default)", EncodeOptions(format="png")),
+    ("png, optimize", EncodeOptions(format="png", optimize=True)),
+    ("png8 quantized", EncodeOptions(format="png8")),
+    ("jpeg q85", EncodeOptions(format="jpeg", quality=85)),
+    ("jpeg q70", EncodeOptions(format="jpeg", quality=70)),
+    ("webp q85", EncodeOptions(format="webp", quality=85)),
+    ("webp q70", EncodeOptions(format="webp", quality=70)),
+    ("webp q85, 640px wide", EncodeOptions(format="webp", quality=85, width=640)),
+    ("png, 60 KB budget", EncodeOptions(format="png", max_bytes=60_000)),
+    ("webp, 30 KB budget", EncodeOptions(format="webp", max_bytes=30_000)),
+]
+
+
+def run(repeats):
+    buf = io.BytesIO()
+    Image.effect_mandelbrot((256, 256), (-2, -1.5, 1, 1.5), 100).convert("RGB").save(buf, "PNG")
+    card = compose_card(fit_avatar(buf.getvalue()), "Some Display Name", "The Void Server", 1234)
+    print(f"card {card.width}x{card.height} {card.mode}")
+
+    for label, options in CASES:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            data, ext = encode_card(card, options)
+        ms = (time.perf_counter() - start) / repeats * 1000
+        print(f"  {label:<24} {ms:8.1f} ms  {len(data) / 1024:8.1f} KB  .{ext}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,104 @@
+"""Compare the old banned-word regex with utils.wordfilter.WordFilter.
+
+Run from the repo root:  python -m benchmarks.bench_wordfilter [messages]
+
+The regex only sees raw text, so it is also reported against an evasion
+corpus (leetspeak, zero-width characters, confusables) to show what it
+misses. List size is scaled up with synthetic words to show how each
+approach grows with the list.
+
+Before timing, the filter must agree with the regex on the plain corpus
+and give the expected answer for every entry in PROBES (evasions that
+must match, ordinary words and names that must not); the script exits 1
+otherwise.
+"""
+import random
+import re
+import string
+import sys
+import time
+
+from utils.wordfilter import WordFilter
+
+BASE_WORDS = [
+    "fuck", "sex", "sexual", "nude", "porn", "horny", "rape", "cum", "masturbate", "shit", "bitch", "asshole",
+    "bastard", "cunt", "dick", "pussy", "slut", "whore", "randi", "madarchod", "bhenchod", "lund", "chutiya",
+    "gaand", "harami", "kamina", "kutta", "kutti", "gandu", "tatti",
+]
+FILLER = ("the quick brown fox jumps over the lazy dog while everyone in the server "
+          "talks about games music memes and homework").split()
+# (message, banned word it must report or None)
+PROBES = [
+    ("f.u.c.k this", "fuck"), ("fuuuck", "fuck"), ("sh!t", "shit"), ("a$$hole", "asshole"),
+    ("\u0455h\u0456t", "shit"), ("kuttttta", "kutta"), ("gaaand", "gaand"), ("taatti", "tatti"),
+    # a one-letter word before a spaced-out run
+    ("what a s h i t", "shit"), ("i f u c k", "fuck"), ("a s s h o l e", "asshole"),
+    # collapsed forms of banned words that are ordinary words or names
+    ("Kuta is in Bali", None), ("Gand", None), ("Tati", None), ("kuti", None),
+    ("i like turtles", None), ("a b c", None), ("hi!", None), ("class assessment", None),
+]
+EVASIONS = ["f.u.c.k", "sh!t", "b1tch", "fu\u200bck", "\u0455h\u0456t", "\uff46\uff55\uff43\uff4b", "a$$hole", "fuuuck"]
+
+
+def corpus(rng, n, words, evasive):
+    msgs = []
+    for _ in range(n):
+        parts = [rng.choice(FILLER) for _ in range(rng.randint(3, 30))]
+        if rng.random() < 0.05:
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(EVASIONS if evasive else words))
+        msgs.append(" ".join(parts))
+    return msgs
+
+
+def synthetic_words(rng, n):
+    return ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10))) for _ in range(n)]
+
+
+def bench(label, fn, msgs):
+    start = time.perf_counter()
+    hits = sum(1 for m in msgs if fn(m))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed / len(msgs) * 1e6:8.2f} us/msg   hits={hits}")
+
+
+def parity(n_msgs) -> list[str]:
+    rng = random.Random(7)
+    filt = WordFilter(BASE_WORDS)
+    regex = re.compile(r"\b(" + "|".join(map(re.escape, BASE_WORDS)) + r")\b", re.IGNORECASE)
+    failures = [
+        f"probe {text!r}: got {filt.find(text)!r}, expected {want!r}"
+        for text, want in PROBES if filt.find(text) != want
+    ]
+    for msg in corpus(rng, n_msgs, BASE_WORDS, evasive=False):
+        if bool(regex.search(msg)) != bool(filt.find(msg)):
+            failures.append(f"regex disagrees on {msg!r}")
+    return failures
+
+
+def run(n_msgs):
+    rng = random.Random(42)
+    for extra in (0, 1_000, 10_000):
+        words = BASE_WORDS + synthetic_words(rng, extra)
+        regex = re.compile(r"\b(" + "|".join(map(re.escape, words)) + r")\b", re.IGNORECASE)
+        start = time.perf_counter()
+        filt = WordFilter(words)
+        build_ms = (time.perf_counter() - start) * 1000
+        plain = corpus(rng, n_msgs, BASE_WORDS, evasive=False)
+        evasive = corpus(rng, n_msgs, BASE_WORDS, evasive=True)
+
+        print(f"{len(words):,} words, {n_msgs:,} messages (automaton build {build_ms:.0f} ms)")
+        bench("regex, plain", regex.search, plain)
+        bench("WordFilter, plain", filt.find, plain)
+        bench("regex, evasive", regex.search, evasive)
+        bench("WordFilter, evasive", filt.find, evasive)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    failures = parity(n)
+    for line in failures:
+        print(f"MISMATCH {line}")
+    if failures:
+        sys.exit(1)
+    print(f"parity: {len(PROBES)} probes and {n:,} plain messages agree")
+    run(n)
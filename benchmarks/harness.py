@@ -0,0 +1,313 @@
+"""Offline stand-ins for Discord, for driving the real cogs without a gateway.
+
+``FakeRest`` plays the REST API. Every stub call that would hit Discord
+(send, delete, timeout, add_roles, ban, ...) awaits ``rest.call(route)``.
+That call sleeps for a configurable latency and, with probability
+``rate_limit``, answers 429 first: it then waits ``retry_after`` and
+retries, the way discord.py's HTTP client does. Avatars are served over
+real HTTP from a local aiohttp app, so ``AvatarCache`` runs unmodified.
+
+The stub ``Guild``/``Member``/``TextChannel``/``Message``/``Interaction``
+classes implement the attributes and coroutines the cogs use, nothing
+more; prefix-command replies (``ctx.send``) go to the stub channel. ``build_bot`` wires a bot with the same ``utils.services.install`` as
+``main.py`` and loads the real cogs.
+"""
+import asyncio
+import io
+import itertools
+import random
+from collections import Counter
+
+import discord
+from aiohttp import web
+from discord.ext import commands
+from PIL import Image
+
+from utils import services
+from utils.flood import FloodDetector
+from utils.sharding import ShardConfig
+_ids = itertools.count(10**17)
+
+
+def snowflake() -> int:
+    return next(_ids)
+
+
+# ===== Fake REST layer =====
+class FakeRest:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_limit: float = 0.0,
+                 retry_after: float = 0.25, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        self.throttled = Counter()
+        self.sent: list[tuple[int, str | None]] = []
+        self._runner: web.AppRunner | None = None
+        self.avatar_url = None
+
+    async def call(self, route: str) -> None:
+        self.calls[route] += 1
+        while True:
+            await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+            if self.rng.random() >= self.rate_limit:
+                return
+            self.throttled[route] += 1
+            await asyncio.sleep(self.retry_after)
+
+    # --- avatar CDN ---
+    async def start(self) -> None:
+        buf = io.BytesIO()
+        Image.new("RGB", (256, 256), (90, 60, 160)).save(buf, "PNG")
+        png = buf.getvalue()
+
+        async def avatar(request):
+            await self.call("cdn.avatar")
+            return web.Response(body=png, content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/avatars/{key}.png", avatar)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.avatar_url = f"http://127.0.0.1:{port}/avatars"
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+
+# ===== Stub Discord objects =====
+class Asset:
+    def __init__(self, rest: FakeRest, key: str):
+        self.rest = rest
+        self.key = key
+
+    @property
+    def url(self) -> str:
+        return f"{self.rest.avatar_url}/{self.key}.png"
+
+    def replace(self, **kwargs):
+        return self
+
+
+class Role:
+    def __init__(self, guild, name: str):
+        self.guild = guild
+        self.id = snowflake()
+        self.name = name
+
+
+class User:
+    def __init__(self, user_id: int, name: str, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.bot = bot
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+
+class Member(User):
+    def __init__(self, guild, name: str, avatar_key: str | None = None, bot: bool = False):
+        super().__init__(snowflake(), name, bot)
+        self.guild = guild
+        self.display_name = name
+        self.roles: list[Role] = []
+        self.joined_at = discord.utils.utcnow()
+        self.display_avatar = Asset(guild.rest, avatar_key or f"a{self.id % 50}")
+
+    async def send(self, content=None, **kwargs):
+        await self.guild.rest.call("dm")
+
+    async def timeout(self, until, *, reason=None):
+        await self.guild.rest.call("member.timeout")
+
+    async def add_roles(self, *roles, reason=None):
+        await self.guild.rest.call("member.add_roles")
+        self.roles.extend(roles)
+
+    async def ban(self, *, reason=None):
+        await self.guild.rest.call("guild.ban")
+        self.guild.remove_member(self.id)
+
+
+class TextChannel:
+    def __init__(self, guild, name: str):
+        self.guild = guild
+        self.id = snowflake()
+        self.name = name
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        await self.guild.rest.call("channel.send")
+        self.guild.rest.sent.append((self.id, content))
+        return Message(self, self.guild.me, content or "")
+
+    async def delete_messages(self, messages, *, reason=None):
+        await self.guild.rest.call("channel.bulk_delete")
+
+
+class Message:
+    def __init__(self, channel: TextChannel, author: Member, content: str):
+        self._state = channel.guild.state  # commands.Context reads it
+        self.id = snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.created_at = discord.utils.utcnow()
+        self.attachments = []
+        self.embeds = []
+
+    async def delete(self):
+        await self.guild.rest.call("message.delete")
+
+
+class Guild:
+    def __init__(self, rest: FakeRest, name: str, bot):
+        self.rest = rest
+        self.state = bot._connection
+        self.id = snowflake()
+        self.name = name
+        self.owner_id = snowflake()
+        self.roles: list[Role] = []
+        self.members: list[Member] = []
+        self._by_id: dict[int, Member] = {}
+        self.chunked = True  # the member list above is complete
+        self.text_channels = [TextChannel(self, n) for n in ("general", "🚪｜welcome", "📁｜mod-logs")]
+        self.system_channel = self.text_channels[0]
+        self.me = Member(self, bot.user.name, bot=True)
+        self.me.id = bot.user.id
+
+    def add_member(self, name: str | None = None) -> Member:
+        member = Member(self, name or f"user{len(self.members)}")
+        self.members.append(member)
+        self._by_id[member.id] = member
+        return member
+
+    def remove_member(self, member_id: int) -> None:
+        self.members = [m for m in self.members if m.id != member_id]
+        self._by_id.pop(member_id, None)
+
+    def get_member(self, user_id: int):
+        return self._by_id.get(user_id)
+
+    def get_channel(self, channel_id: int):
+        return next((c for c in self.text_channels if c.id == channel_id), None)
+
+    def get_role(self, role_id: int):
+        return next((r for r in self.roles if r.id == role_id), None)
+
+    async def create_role(self, *, name, reason=None, **kwargs):
+        await self.rest.call("guild.create_role")
+        role = Role(self, name)
+        self.roles.append(role)
+        return role
+
+    async def bulk_ban(self, users, *, reason=None, delete_message_seconds=0):
+        await self.rest.call("guild.bulk_ban")
+        for user in users:
+            self.remove_member(user.id)
+        return discord.guild.BulkBanResult(banned=list(users), failed=[])
+
+
+class _Response:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    async def defer(self, *, ephemeral=False, thinking=False):
+        await self.interaction.guild.rest.call("interaction.defer")
+        self.done = True
+
+    async def send_message(self, content=None, **kwargs):
+        await self.interaction.guild.rest.call("interaction.respond")
+        self.interaction.replies.append(content)
+        self.done = True
+
+
+class _Followup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        await self.interaction.guild.rest.call("interaction.followup")
+        self.interaction.replies.append(content)
+
+
+class Interaction:
+    def __init__(self, user: Member, channel: TextChannel):
+        self.id = snowflake()
+        self.user = user
+        self.guild = channel.guild
+        self.channel = channel
+        self.extras = {}
+        self.replies: list[str | None] = []  # response and followup contents
+        self.created_at = discord.utils.utcnow()
+        self.response = _Response(self)
+        self.followup = _Followup(self)
+
+    async def edit_original_response(self, **kwargs):
+        await self.guild.rest.call("interaction.edit")
+
+
+class Context(commands.Context):
+    """Prefix-command context whose replies go to the stub channel."""
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class Bot(commands.Bot):
+    async def get_context(self, origin, *, cls=Context):
+        return await super().get_context(origin, cls=cls)
+
+
+# ===== Bot wiring (shared with main.py) =====
+async def build_bot(flood: FloodDetector | None = None) -> commands.Bot:
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+    bot = Bot(command_prefix="!", intents=intents)
+    bot._connection.user = User(snowflake(), "harness-bot", bot=True)
+    # what login() would do: bind the bot to the running loop (for dispatch)
+    await bot._async_setup_hook()
+    services.install(bot, ShardConfig(), flood)
+
+    await asyncio.gather(*(bot.load_extension(ext) for ext in services.COGS))
+    await bot.get_cog("Levels").loaded()
+    return bot
+
+
+async def settle(bot, poll: float = 0.02) -> None:
+    """Wait until dispatched events, queued moderation actions, welcome
+    bursts/renders and outbound sends have all finished."""
+    welcome = bot.get_cog("Welcome")
+    moderation = bot.get_cog("Moderation")
+
+    def busy() -> bool:
+        if any(t.get_name().startswith("discord.py:") and not t.done() for t in asyncio.all_tasks()):
+            return True
+        if moderation and (moderation.actions.pending or moderation.bulk_jobs):
+            return True
+        if welcome and (welcome.bursts._pending or welcome.bursts._tasks or welcome.renderer.in_flight):
+            return True
+        return bool(bot.outbound.depth or bot.outbound._workers)
+
+    while busy():
+        await asyncio.sleep(poll)
@@ -2,18 +2,46 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import math
-from datetime import datetime, timedelta
-import json
 import os
+import asyncio
+import time
+from bisect import bisect_right
+from typing import Literal
 
-DATA_FILE = "levels.json"
+from utils import outbound, pipeline
+from utils.member_table import MemberTable
+from utils.metrics import instrument
+from utils.ranking import RankIndex
+from utils.startup import timer as startup
+from utils.xp_store import LEGACY_GUILD, WriteBehind, daily_iso, daily_timestamp, migrate_legacy, open_store
+
+PAGE_SIZE = 10
+DAILY_COOLDOWN = 86400
+DAILY_REWARD = 50
+# seconds a global leaderboard page is reused before it is re-read from the store
+GLOBAL_TTL = float(os.getenv("LEVELS_GLOBAL_TTL", 60))
+
+# level = floor(sqrt(xp) / 2), i.e. level n starts at (2n)^2 XP
+MAX_TABLE_LEVEL = 1000
+LEVEL_THRESHOLDS = [(2 * lvl) ** 2 for lvl in range(MAX_TABLE_LEVEL + 1)]
+
+def level_for(xp):
+    if xp >= LEVEL_THRESHOLDS[-1]:
+        return int(math.sqrt(xp) // 2)
+    return bisect_right(LEVEL_THRESHOLDS, xp) - 1
 
 class Levels(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.user_xp = {}
-        self.last_daily = {}
-        self.user_roles = {}
+        # all state is partitioned by guild: {guild_id: MemberTable}
+        self.members: dict[int, MemberTable] = {}
+        self.ranks = {}
+        # XP added since the last flush, written to a shared store as increments
+        self.gained = {}
+        # {page: (expires_at, [(rank, name, xp)])} for the cross-shard leaderboard
+        self.global_pages = {}
+        # pre-partition data waiting to be handed to a guild: {user_id: (xp, daily, roles)}
+        self.legacy = {}
         self.level_roles = {
             5: "Novice Voidwalker",
             10: "Abyssal Explorer",
@@ -24,92 +52,406 @@ class Levels(commands.Cog):
             100: "Abyssal Lord",
             150: "Cosmic Overlord"
         }
-        self.load_data()
-
-    # JSON persistence
-    def save_data(self):
-        data = {
-            "user_xp": self.user_xp,
-            "last_daily": {str(k): v.isoformat() for k, v in self.last_daily.items()},
-            "user_roles": {str(k): v for k, v in self.user_roles.items()},
-        }
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f)
-
-    def load_data(self):
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-                self.user_xp = {int(k): v for k, v in data.get("user_xp", {}).items()}
-                self.last_daily = {
-                    int(k): datetime.fromisoformat(v)
-                    for k, v in data.get("last_daily", {}).items()
-                }
-                self.user_roles = {int(k): v for k, v in data.get("user_roles", {}).items()}
-
-    # Leveling system
+        self.milestones = sorted(self.level_roles)
+        # earned roles are a bitmask over milestones: bit i = milestones[i]
+        self.role_bits = {self.level_roles[lvl]: 1 << i for i, lvl in enumerate(self.milestones)}
+        # {guild_id: {milestone_level: role_id}}, filled on first use
+        self.role_ids = {}
+        self._role_locks = {}
+        self.store = None
+        self.writer = None
+        self._loader = None
+
+    # Persistence (write-behind, see utils/xp_store.py)
+    async def cog_load(self):
+        # the store is read in a thread while the other cogs load and the bot
+        # logs in; handlers wait on loaded() until it is done
+        self._loader = asyncio.create_task(self.load_data())
+        self.bot.pipeline.add_stage("xp", self.award_xp, pipeline.XP)
+
+    async def cog_unload(self):
+        self.bot.pipeline.remove_stage("xp")
+        try:
+            await self._loader  # a thread can't be cancelled; let it finish
+        except Exception:
+            return
+        await self.writer.close()
+
+    async def loaded(self):
+        """Wait for the state load (re-raising its error if it failed)."""
+        # shield: a cancelled command must not cancel the load
+        await asyncio.shield(self._loader)
+
+    async def cog_before_invoke(self, ctx):
+        await self.loaded()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        await self.loaded()
+        return True
+
+    def _row(self, key):
+        guild_id, user_id = key
+        if guild_id == LEGACY_GUILD:
+            if user_id not in self.legacy:
+                return None
+            xp, daily, roles = self.legacy[user_id]
+            return (guild_id, user_id, xp, daily, roles)
+
+        table = self.members.get(guild_id)
+        if table is None or user_id not in table:
+            return None
+        daily = table.get_daily(user_id)
+        return (
+            guild_id,
+            user_id,
+            table.get_xp(user_id),
+            daily_iso(daily) if daily else None,
+            self.role_names(table.get_roles(user_id)),
+        )
+
+    def _all_rows(self):
+        # the writer consumes this in chunks between other handlers, so
+        # iterate over copies of the key sets
+        for uid in list(self.legacy):
+            yield self._row((LEGACY_GUILD, uid))
+        for guild_id, table in list(self.members.items()):
+            for uid in list(table.slots):
+                yield self._row((guild_id, uid))
+
+    # --- Compact state helpers ---
+    def _table(self, guild_id):
+        table = self.members.get(guild_id)
+        if table is None:
+            table = self.members[guild_id] = MemberTable()
+        return table
+
+    def role_mask(self, names):
+        mask = 0
+        for name in names:
+            mask |= self.role_bits.get(name, 0)
+        return mask
+
+    def role_names(self, mask):
+        return [self.level_roles[lvl] for i, lvl in enumerate(self.milestones) if mask >> i & 1]
+
+    def _load_member(self, table, user_id, xp, daily, roles):
+        table.set_xp(user_id, xp)
+        if daily:
+            table.set_daily(user_id, daily_timestamp(daily))
+        if roles:
+            table.add_roles(user_id, self.role_mask(roles))
+
+    def save_data(self, guild_id, user_id):
+        """Queue one member's row for the next batched flush."""
+        self.writer.mark((guild_id, user_id))
+
+    def _read_state(self):
+        """Open the store and build the per-guild tables (runs in a thread)."""
+        store = open_store()
+        sharding = self.bot.sharding
+        if sharding.multi_process and not store.shared:
+            raise RuntimeError(f"{type(store).__name__} can't be shared between shard workers; use LEVELS_BACKEND=sqlite")
+        if sharding.primary:
+            migrate_legacy(store)
+        members, legacy = {}, {}
+        for guild_id, user_id, xp, daily, roles in store.load():
+            if guild_id == LEGACY_GUILD:
+                legacy[user_id] = (xp, daily, roles)
+                continue
+            # other workers own the guilds on their shards
+            if not sharding.owns(guild_id):
+                continue
+            table = members.get(guild_id)
+            if table is None:
+                table = members[guild_id] = MemberTable()
+            self._load_member(table, user_id, xp, daily, roles)
+        ranks = {gid: RankIndex(table) for gid, table in members.items()}
+        return store, members, legacy, ranks
+
+    async def load_data(self):
+        try:
+            with startup.phase("state load/levels"):
+                self.store, self.members, self.legacy, self.ranks = await asyncio.to_thread(self._read_state)
+        except Exception as e:
+            print(f"⚠️ Levels failed to load its data: {e}")
+            raise
+        self.writer = WriteBehind(
+            self.store, self._row, self._all_rows,
+            interval_ms=int(os.getenv("LEVELS_FLUSH_MS", 500)),
+            max_pending=int(os.getenv("LEVELS_FLUSH_UPDATES", 200)),
+            gained=self.gained,
+        )
+        self.writer.start()
+
+    # --- Guild partitions ---
+    def _rank_index(self, guild_id):
+        index = self.ranks.get(guild_id)
+        if index is None:
+            index = self.ranks[guild_id] = RankIndex(self._table(guild_id))
+        return index
+
+    def _gain(self, guild_id, user_id, amount):
+        key = (guild_id, user_id)
+        self.gained[key] = self.gained.get(key, 0) + amount
+
+    def _add_xp(self, guild_id, user_id, amount, stored=False):
+        """Add XP in memory and queue the row; ``stored`` means the store
+        already has the XP (e.g. a /daily claim) and only the row is queued."""
+        self._claim_legacy(guild_id, user_id)
+        xp = self._table(guild_id).add_xp(user_id, amount)
+        self._rank_index(guild_id).moved(user_id, xp - amount)
+        if not stored:
+            self._gain(guild_id, user_id, amount)
+        self.save_data(guild_id, user_id)
+        return xp
+
+    def _assign_legacy(self, guild_id, user_id, entry):
+        xp, daily, roles = entry
+        self._load_member(self._table(guild_id), user_id, xp, daily, roles)
+        self._rank_index(guild_id).add(user_id)
+        self._gain(guild_id, user_id, xp)
+        self.save_data(guild_id, user_id)
+
+    def _claim_legacy(self, guild_id, user_id):
+        """Move a user's pre-partition data into the first guild they show up in."""
+        entry = self.legacy.pop(user_id, None)
+        if entry is None:
+            return
+        if user_id not in self._table(guild_id):
+            self._assign_legacy(guild_id, user_id, entry)
+        self._drop_legacy_row(user_id)
+
+    def _drop_legacy_row(self, user_id):
+        # Other workers still need the row for the guilds on their shards;
+        # the store drops it once every shard has split (finish_legacy_split).
+        if not self.bot.sharding.multi_process:
+            self.save_data(LEGACY_GUILD, user_id)
+
+    async def _finish_legacy_split(self):
+        sharding = self.bot.sharding
+        await self.writer.flush()  # our copies must be stored before the sweep
+        deleted = await asyncio.to_thread(self.store.finish_legacy_split, sharding.shard_ids, sharding.shard_count)
+        if deleted:
+            print(f"📦 Every shard has split legacy XP; removed {deleted} old rows")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.loaded()
+        # One-time migration: flat XP is copied to every guild the user is in.
+        if self.legacy:
+            moved = []
+            for user_id, entry in self.legacy.items():
+                found = False
+                for guild in self.bot.guilds:
+                    if guild.get_member(user_id) and user_id not in self._table(guild.id):
+                        self._assign_legacy(guild.id, user_id, entry)
+                        found = True
+                if found:
+                    moved.append(user_id)
+            for user_id in moved:
+                del self.legacy[user_id]
+                self._drop_legacy_row(user_id)
+            print(f"📦 Split {len(moved)} users' XP into guilds ({len(self.legacy)} left unassigned)")
+        if self.bot.sharding.multi_process:
+            await self._finish_legacy_split()
+        pruned = sum(self._prune_departed(guild) for guild in self.bot.guilds)
+        if pruned:
+            print(f"🧹 Dropped {pruned} departed members from the rank index")
+
+    def _prune_departed(self, guild):
+        """Drop users who are no longer in ``guild`` from its rank index
+        (their XP stays in the table). Only once the member cache is
+        complete; before that a miss doesn't mean they left."""
+        index = self.ranks.get(guild.id)
+        table = self.members.get(guild.id)
+        if not index or table is None or not guild.chunked:
+            return 0
+        departed = [user_id for user_id in table.slots if guild.get_member(user_id) is None]
+        for user_id in departed:
+            index.remove(user_id)
+        return len(departed)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        await self.loaded()
+        index = self.ranks.get(member.guild.id)
+        if index:
+            index.remove(member.id)
+
     @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot:
+    async def on_member_join(self, member):
+        await self.loaded()
+        table = self.members.get(member.guild.id)
+        if table and member.id in table:
+            self._rank_index(member.guild.id).add(member.id)
+
+    # Leveling system (pipeline stage; bots are already filtered out)
+    async def award_xp(self, message):
+        if message.guild is None:
+            return
+        await self.loaded()
+        # no XP (or disk writes) while the guild is being flooded
+        if self.bot.flood.degraded(message.guild.id):
             return
 
+        guild_id = message.guild.id
         user_id = message.author.id
-        self.user_xp[user_id] = self.user_xp.get(user_id, 0) + 10
-        self.save_data()
+        # merge any pre-partition XP first, so it doesn't count as a level-up
+        self._claim_legacy(guild_id, user_id)
+        old_xp = self._table(guild_id).get_xp(user_id)
+        xp = self._add_xp(guild_id, user_id, 10)
+
+        old_level = level_for(old_xp)
+        new_level = level_for(xp)
 
-        new_level = int(math.sqrt(self.user_xp[user_id]) // 2)
-        current_level = getattr(message.author, "level", 0)
+        if new_level > old_level:
+            self.bot.outbound.send(
+                message.channel, f"🎉 {message.author.mention} leveled up to **Level {new_level}**!",
+                priority=outbound.LEVELUP
+            )
+            await self.grant_milestones(message.author, old_level, new_level, message.channel)
 
-        if new_level > current_level:
-            setattr(message.author, "level", new_level)
-            await message.channel.send(f"🎉 {message.author.mention} leveled up to **Level {new_level}**!")
+    # --- Level roles ---
+    async def level_role(self, guild, level):
+        """Return the role for milestone ``level``, creating it at most once."""
+        cache = self.role_ids.setdefault(guild.id, {})
+        role = guild.get_role(cache.get(level, 0))
+        if role:
+            return role
 
-            if new_level in self.level_roles:
-                role_name = self.level_roles[new_level]
-                role = discord.utils.get(message.guild.roles, name=role_name)
+        lock = self._role_locks.setdefault((guild.id, level), asyncio.Lock())
+        async with lock:
+            # someone else may have resolved or created it while we waited
+            role = guild.get_role(cache.get(level, 0))
+            if role is None:
+                role_name = self.level_roles[level]
+                role = discord.utils.get(guild.roles, name=role_name)
                 if not role:
-                    role = await message.guild.create_role(
+                    role = await guild.create_role(
                         name=role_name,
                         color=discord.Color.purple(),
-                        reason=f"Created for level {new_level}"
+                        reason=f"Created for level {level}"
                     )
+                cache[level] = role.id
+            return role
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.role_ids.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            self.role_ids.pop(after.guild.id, None)
+
+    async def grant_milestones(self, member, old_level, new_level, channel):
+        """Give ``member`` the roles for milestones in ``(old_level, new_level]``."""
+        guild_id = member.guild.id
+        table = self._table(guild_id)
+
+        start = bisect_right(self.milestones, old_level)
+        end = bisect_right(self.milestones, new_level)
+        for bit, level in enumerate(self.milestones[start:end], start):
+            if table.get_roles(member.id) >> bit & 1:
+                continue
+            role_name = self.level_roles[level]
+            role = await self.level_role(member.guild, level)
+            await member.add_roles(role)
+            table.add_roles(member.id, 1 << bit)
+            self.save_data(guild_id, member.id)
+            self.bot.outbound.send(
+                channel, f"🏅 {member.mention} earned **{role_name}**!",
+                priority=outbound.LEVELUP
+            )
 
-                given_roles = self.user_roles.get(user_id, [])
-                if role_name not in given_roles:
-                    await message.author.add_roles(role)
-                    given_roles.append(role_name)
-                    self.user_roles[user_id] = given_roles
-                    self.save_data()
-                    await message.channel.send(f"🏅 {message.author.mention} earned **{role_name}**!")
+    @instrument("levels.reconcile_roles")
+    async def reconcile_roles(self, guild, batch_size=10, pause=1.0):
+        """Grant every member with XP the milestone roles they are missing.
 
-        await self.bot.process_commands(message)
+        Members are updated ``batch_size`` at a time (one ``add_roles`` call
+        each) with ``pause`` seconds between batches to stay under rate limits.
+        Returns ``(roles granted, members updated, failures)``.
+        """
+        todo = []
+        table = self._table(guild.id)
+        for user_id, xp in list(table.xp_items()):
+            member = guild.get_member(user_id)
+            if member is None:
+                continue
+            reached = self.milestones[:bisect_right(self.milestones, level_for(xp))]
+            if not reached:
+                continue
+            have = {r.id for r in member.roles}
+            missing = [role for role in [await self.level_role(guild, lvl) for lvl in reached] if role.id not in have]
+            if missing:
+                todo.append((member, missing))
+
+        granted = updated = failed = 0
+        for i in range(0, len(todo), batch_size):
+            batch = todo[i:i + batch_size]
+            results = await asyncio.gather(
+                *(member.add_roles(*roles, reason="Level role sync") for member, roles in batch),
+                return_exceptions=True
+            )
+            for (member, roles), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    failed += 1
+                    continue
+                table.add_roles(member.id, self.role_mask(r.name for r in roles))
+                self.save_data(guild.id, member.id)
+                granted += len(roles)
+                updated += 1
+            if i + batch_size < len(todo):
+                await asyncio.sleep(pause)
+        return granted, updated, failed
+
+    @commands.command()
+    @commands.guild_only()
+    @commands.has_permissions(manage_roles=True)
+    async def syncroles(self, ctx):
+        await ctx.send("🔄 Syncing level roles...")
+        granted, updated, failed = await self.reconcile_roles(ctx.guild)
+        await ctx.send(f"🏅 Granted **{granted}** roles to **{updated}** members ({failed} failed).")
+
+    @app_commands.command(name="syncroles", description="Grant every member the level roles they are missing")
+    @app_commands.guild_only()
+    @app_commands.default_permissions(manage_roles=True)
+    async def syncroles_slash(self, interaction: discord.Interaction):
+        await interaction.response.defer(thinking=True)  # ✅ prevent timeout
+        granted, updated, failed = await self.reconcile_roles(interaction.guild)
+        await interaction.followup.send(f"🏅 Granted **{granted}** roles to **{updated}** members ({failed} failed).")
 
     # Prefix rank command
     @commands.command(aliases=["rank"])
+    @commands.guild_only()
     async def level(self, ctx, member: discord.Member = None):
         member = member or ctx.author
         await self.send_level_embed(ctx, member)
 
     # Slash rank command
     @app_commands.command(name="level", description="Check your current level, XP, rank, and roles")
+    @app_commands.guild_only()
     async def level_slash(self, interaction: discord.Interaction, member: discord.Member | None = None):
         await interaction.response.defer(thinking=True)  # ✅ prevent timeout
         member = member or interaction.user
         await self.send_level_embed(interaction, member, slash=True)
 
+    @instrument("levels.level_embed")
     async def send_level_embed(self, ctx, member, slash=False):
-        xp = self.user_xp.get(member.id, 0)
-        lvl = int(math.sqrt(xp) // 2)
+        guild_id = member.guild.id
+        self._claim_legacy(guild_id, member.id)
+        table = self._table(guild_id)
+        xp = table.get_xp(member.id)
+        lvl = level_for(xp)
         next_level_xp = ((lvl + 1) * 2) ** 2
         progress = min(xp / next_level_xp, 1)
         progress_bar = "█" * int(progress * 20) + "─" * (20 - int(progress * 20))
 
-        earned_roles = self.user_roles.get(member.id, [])
+        earned_roles = self.role_names(table.get_roles(member.id))
         roles_display = ", ".join(earned_roles) if earned_roles else "None"
 
-        # --- Rank calculation ---
-        sorted_users = sorted(self.user_xp.items(), key=lambda x: x[1], reverse=True)
-        rank = next((i for i, (uid, _) in enumerate(sorted_users, start=1) if uid == member.id), None)
+        # --- Rank lookup (this guild's index, no sort) ---
+        rank = self._rank_index(guild_id).rank(member.id)
 
         embed = discord.Embed(
             title=f"{member.display_name}'s Level Progress",
@@ -128,64 +470,164 @@ class Levels(commands.Cog):
             await ctx.send(embed=embed)
 
     # Leaderboard
-    @commands.command()
-    async def leaderboard(self, ctx):
-        if not self.user_xp:
-            return await ctx.send("⚠️ No XP data yet!")
+    def leaderboard_page(self, guild, page=1):
+        """Return ``(rank, member, xp)`` rows for one page of ``guild``.
+
+        Ranks are positions in the index, the same ones ``/level`` shows.
+        The index is scanned until the page has ``PAGE_SIZE`` members.
+        Users ``guild.get_member`` can't resolve are skipped; once the
+        member cache is complete that means they left while the bot was
+        offline, so they are also dropped from the index.
+        """
+        index = self.ranks.get(guild.id)
+        if not index:
+            return []
+
+        offset = (max(page, 1) - 1) * PAGE_SIZE
+        rows, departed = [], []
+        for rank, (user_id, xp) in enumerate(index.iter_from(offset), offset + 1):
+            member = guild.get_member(user_id)
+            if member is not None:
+                rows.append((rank - len(departed), member, xp))
+                if len(rows) == PAGE_SIZE:
+                    break
+            elif guild.chunked:
+                departed.append(user_id)
+        for user_id in departed:
+            index.remove(user_id)
+        return rows
+
+    def leaderboard_embed(self, guild, page=1):
+        rows = self.leaderboard_page(guild, page)
+        if not rows:
+            return None
 
-        sorted_users = sorted(self.user_xp.items(), key=lambda x: x[1], reverse=True)[:10]
         embed = discord.Embed(title="🏆 Leaderboard - Top Voidwalkers", color=discord.Color.gold())
-        for i, (user_id, xp) in enumerate(sorted_users, start=1):
-            member = ctx.guild.get_member(user_id)
-            if member:
-                lvl = int(math.sqrt(xp) // 2)
-                embed.add_field(name=f"{i}. {member.display_name}",
-                                value=f"Level {lvl} | {xp} XP", inline=False)
+        for rank, member, xp in rows:
+            lvl = level_for(xp)
+            embed.add_field(name=f"{rank}. {member.display_name}",
+                            value=f"Level {lvl} | {xp} XP", inline=False)
+        embed.set_footer(text=f"Page {max(page, 1)}")
+        return embed
+
+    # --- Cross-shard leaderboard ---
+    async def _display_name(self, user_id):
+        # users outside this worker's guilds aren't cached here
+        user = self.bot.get_user(user_id)
+        if user is None:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.HTTPException:
+                return f"User {user_id}"
+        return user.display_name
+
+    async def global_page(self, page=1):
+        """Return ``(rank, name, xp)`` rows for one page of XP summed over
+        every server.
+
+        With a shared store this is read from the database, so it covers
+        the guilds of every shard worker, not just this one's. Pages are
+        kept for ``LEVELS_GLOBAL_TTL`` seconds.
+        """
+        page = max(page, 1)
+        now = time.monotonic()
+        cached = self.global_pages.get(page)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        offset = (page - 1) * PAGE_SIZE
+        if self.store.shared:
+            await self.writer.flush()  # include this worker's pending XP
+            top = await asyncio.to_thread(self.store.top_users, PAGE_SIZE, offset)
+        else:
+            totals = {}
+            for table in self.members.values():
+                for user_id, xp in table.xp_items():
+                    totals[user_id] = totals.get(user_id, 0) + xp
+            top = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[offset:offset + PAGE_SIZE]
+
+        names = await asyncio.gather(*(self._display_name(user_id) for user_id, _ in top))
+        rows = [(offset + i, name, xp) for i, (name, (_, xp)) in enumerate(zip(names, top), 1)]
+        self.global_pages = {p: entry for p, entry in self.global_pages.items() if entry[0] > now}
+        self.global_pages[page] = (now + GLOBAL_TTL, rows)
+        return rows
+
+    async def global_embed(self, page=1):
+        rows = await self.global_page(page)
+        if not rows:
+            return None
+
+        embed = discord.Embed(title="🌌 Global Leaderboard - All Servers", color=discord.Color.gold())
+        for rank, name, xp in rows:
+            embed.add_field(name=f"{rank}. {name}", value=f"Level {level_for(xp)} | {xp} XP", inline=False)
+        embed.set_footer(text=f"Page {max(page, 1)}")
+        return embed
 
+    @commands.command()
+    @commands.guild_only()
+    async def leaderboard(self, ctx, page: int = 1, scope: Literal["server", "global"] = "server"):
+        if scope == "global":
+            embed = await self.global_embed(page)
+        else:
+            embed = self.leaderboard_embed(ctx.guild, page)
+        if embed is None:
+            return await ctx.send("⚠️ No XP data yet!")
         await ctx.send(embed=embed)
 
     @app_commands.command(name="leaderboard", description="View the top players")
-    async def leaderboard_slash(self, interaction: discord.Interaction):
+    @app_commands.describe(scope="This server, or XP summed over every server the bot is in")
+    @app_commands.guild_only()
+    async def leaderboard_slash(self, interaction: discord.Interaction, page: app_commands.Range[int, 1] = 1,
+                                scope: Literal["server", "global"] = "server"):
         await interaction.response.defer(thinking=True)  # ✅ prevent timeout
 
-        if not self.user_xp:
+        if scope == "global":
+            embed = await self.global_embed(page)
+        else:
+            embed = self.leaderboard_embed(interaction.guild, page)
+        if embed is None:
             return await interaction.followup.send("⚠️ No XP data yet!")
-
-        sorted_users = sorted(self.user_xp.items(), key=lambda x: x[1], reverse=True)[:10]
-        embed = discord.Embed(title="🏆 Leaderboard - Top Voidwalkers", color=discord.Color.gold())
-        for i, (user_id, xp) in enumerate(sorted_users, start=1):
-            member = interaction.guild.get_member(user_id)
-            if member:
-                lvl = int(math.sqrt(xp) // 2)
-                embed.add_field(name=f"{i}. {member.display_name}",
-                                value=f"Level {lvl} | {xp} XP", inline=False)
-
         await interaction.followup.send(embed=embed)
 
     # Daily reward
     @commands.command()
+    @commands.guild_only()
     async def daily(self, ctx):
         await self.handle_daily(ctx)
 
     @app_commands.command(name="daily", description="Claim your daily XP reward")
+    @app_commands.guild_only()
     async def daily_slash(self, interaction: discord.Interaction):
         await interaction.response.defer(thinking=True)  # ✅ prevent timeout
         await self.handle_daily(interaction, slash=True)
 
     async def handle_daily(self, ctx, slash=False):
         user_id = ctx.author.id if not slash else ctx.user.id
-        now = datetime.utcnow()
+        guild_id = ctx.guild.id
+        self._claim_legacy(guild_id, user_id)
+        table = self._table(guild_id)
+        last_daily = table.get_daily(user_id)
+        now = time.time()
+
+        claimed = not (last_daily and now < last_daily + DAILY_COOLDOWN)
+        if claimed and self.store.shared:
+            # the store has the final say, so a claim can't be made twice across workers
+            blocked_by = await asyncio.to_thread(
+                self.store.claim_daily, guild_id, user_id, now, DAILY_COOLDOWN, DAILY_REWARD
+            )
+            if blocked_by is not None:
+                claimed, last_daily = False, blocked_by
+                table.set_daily(user_id, blocked_by)
 
-        if user_id in self.last_daily and now < self.last_daily[user_id] + timedelta(hours=24):
-            remaining = self.last_daily[user_id] + timedelta(hours=24) - now
-            hours, remainder = divmod(int(remaining.total_seconds()), 3600)
+        if not claimed:
+            remaining = last_daily + DAILY_COOLDOWN - now
+            hours, remainder = divmod(int(remaining), 3600)
             minutes, _ = divmod(remainder, 60)
             msg = f"⏳ {ctx.author.mention if not slash else ctx.user.mention}, you can claim daily again in **{hours}h {minutes}m**."
         else:
-            self.user_xp[user_id] = self.user_xp.get(user_id, 0) + 50
-            self.last_daily[user_id] = now
-            self.save_data()
-            msg = f"🎁 {ctx.author.mention if not slash else ctx.user.mention}, you claimed your daily reward of **50 XP**!"
+            table.set_daily(user_id, now)
+            self._add_xp(guild_id, user_id, DAILY_REWARD, stored=self.store.shared)
+            msg = f"🎁 {ctx.author.mention if not slash else ctx.user.mention}, you claimed your daily reward of **{DAILY_REWARD} XP**!"
 
         if slash:
             await ctx.followup.send(msg)  # ✅ send after deferring
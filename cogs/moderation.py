@@ -1,17 +1,30 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
 import os
 import datetime
+import asyncio
 import re
+from typing import Literal
 
-DATA_FILE = "warnings.json"
+from utils import outbound, pipeline
+from utils.action_queue import ActionQueue
+from utils.bulk import BulkJob
+from utils.metrics import instrument
+from utils.startup import timer as startup
+from utils.warnings_store import WarningStore
+from utils.wordfilter import FilterRegistry
+
+BULK_DELETE_MAX = 100   # messages per delete_messages call
+BULK_BAN_MAX = 200      # users per bulk_ban call
+BULK_DELETE_AGE = datetime.timedelta(days=14, minutes=-5)  # older messages can't be bulk deleted
 
 class Moderation(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.warnings: dict[int, int] = {}
+        # per-guild warning records, opened in cog_load; they stop counting after WARN_EXPIRE_DAYS
+        self.warnings: WarningStore | None = None
+        self.ban_threshold = int(os.getenv("WARN_BAN_THRESHOLD", 4))
         self.banned_words = [
             # English
             "fuck", "sex", "sexual", "nude", "porn", "horny", "rape", "cum", "masturbate", "shit", "bitch", "asshole", "bastard", "cunt", "dick", "pussy", "slut", "whore",
@@ -19,119 +32,456 @@ class Moderation(commands.Cog):
             "randi", "madarchod", "bhenchod", "lund", "chutiya", "gaand", "harami",
             "kamina", "kutta", "kutti", "gandu", "tatti"
         ]
-        # compile regex for performance, word boundaries + case insensitive
-        self.banned_regex = re.compile(r"\b(" + "|".join(map(re.escape, self.banned_words)) + r")\b", re.IGNORECASE)
-        self.load_data()
+        # normalized Aho-Corasick filters, per guild, hot-reloaded from banned_words.json
+        self.filters = FilterRegistry(self.banned_words)
+        # moderation side effects run here, ordered per (guild, user)
+        self.actions = ActionQueue(
+            "moderation",
+            workers=int(os.getenv("MOD_ACTION_WORKERS", 4)),
+            max_pending=int(os.getenv("MOD_ACTION_MAX_PENDING", 1000)),
+        )
+        # purge / mass timeout / mass ban, at most one per guild at a time
+        self.bulk_jobs: dict[int, asyncio.Task] = {}
+        self.bulk_pace = int(os.getenv("MOD_BULK_PACE_MS", 500)) / 1000
+        self._pruner: asyncio.Task | None = None
+        self.bot.channel_resolver.register(
+            "log", lambda guild: discord.utils.get(guild.text_channels, name="📁｜mod-logs")
+        )
+
+    async def cog_load(self):
+        # opening (and maybe migrating) the database stays off the event loop
+        with startup.phase("state load/warnings"):
+            self.warnings = await asyncio.to_thread(
+                WarningStore, expire_after=float(os.getenv("WARN_EXPIRE_DAYS", 30)) * 86400
+            )
+        self.actions.start()
+        self._pruner = asyncio.create_task(self.prune_warnings())
+        self.bot.flood.on_degrade = self.flood_alert
+        self.bot.pipeline.add_stage("flood", self.check_flood, pipeline.FLOOD)
+        self.bot.pipeline.add_stage("moderation", self.scan_message, pipeline.MODERATION)
 
-    # === JSON persistence ===
-    def save_data(self):
-        with open(DATA_FILE, "w") as f:
-            json.dump(self.warnings, f)
+    async def cog_unload(self):
+        self.bot.pipeline.remove_stage("flood")
+        self.bot.pipeline.remove_stage("moderation")
+        self.bot.flood.on_degrade = None
+        for task in self.bulk_jobs.values():
+            task.cancel()
+        await asyncio.gather(*self.bulk_jobs.values(), return_exceptions=True)
+        await self.actions.close()
+        self._pruner.cancel()
+        self.warnings.close()
 
-    def load_data(self):
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-                self.warnings = {int(k): v for k, v in data.items()}
+    # === Warning expiry ===
+    async def prune_warnings(self, every: float = 3600):
+        while True:
+            removed = await asyncio.to_thread(self.warnings.prune)
+            if removed:
+                print(f"🧹 Pruned {removed} expired warning(s)")
+            await asyncio.sleep(every)
 
     # === Logging helper ===
     async def log_action(self, guild: discord.Guild, message: str):
-        log_channel = discord.utils.get(guild.text_channels, name="📁｜mod-logs")
+        log_channel = self.bot.channel_resolver.resolve(guild, "log")
         if log_channel:
-            await log_channel.send(message)
+            await self.bot.outbound.send(log_channel, message, priority=outbound.LOG)
 
     # === Helper: check moderator role ===
     async def is_moderator(self, interaction: discord.Interaction) -> bool:
         role = discord.utils.get(interaction.user.roles, name="｜Void Sentinels")
         return role is not None
 
+    # === Helper: queue an action behind the member's earlier ones ===
+    async def run_for_member(self, member: discord.Member, job, send_func):
+        fut = self.actions.submit((member.guild.id, member.id), job)
+        if fut is None:
+            return await send_func("⏳ Moderation queue is full, try again in a moment.")
+        await fut
+
     # === Helper methods (shared) ===
-    async def add_warning(self, member: discord.Member, reason: str, send_func):
-        user_id = member.id
-        self.warnings[user_id] = self.warnings.get(user_id, 0) + 1
-        count = self.warnings[user_id]
-        self.save_data()
+    async def add_warning(self, member: discord.Member, reason: str, send_func, moderator: discord.abc.User | None = None):
+        moderator_id = (moderator or self.bot.user).id
+        # the store blocks on SQLite locks (other shard workers, a running prune); keep that off the loop
+        count = await asyncio.to_thread(self.warnings.add, member.guild.id, member.id, moderator_id, reason)
+        limit = self.ban_threshold
 
-        await send_func(f"⚠️ {member.mention} has been warned! Reason: {reason} ({count}/4)")
-        await self.log_action(member.guild, f"⚠️ {member} warned. Reason: {reason} ({count}/4)")
+        await asyncio.gather(
+            send_func(f"⚠️ {member.mention} has been warned! Reason: {reason} ({count}/{limit})"),
+            self.log_action(member.guild, f"⚠️ {member} warned. Reason: {reason} ({count}/{limit})"),
+        )
 
-        if count >= 4:
+        if count >= limit:
             try:
                 await member.ban(reason="Exceeded warning limit")
-                await send_func(f"⛔ {member.mention} has been banned after 4 warnings.")
-                await self.log_action(member.guild, f"⛔ {member} banned after 4 warnings.")
                 # reset warnings after ban
-                self.warnings.pop(user_id, None)
-                self.save_data()
+                await asyncio.to_thread(self.warnings.clear, member.guild.id, member.id)
+                await asyncio.gather(
+                    send_func(f"⛔ {member.mention} has been banned after {limit} warnings."),
+                    self.log_action(member.guild, f"⛔ {member} banned after {limit} warnings."),
+                )
             except discord.Forbidden:
                 await send_func("❌ I don’t have permission to ban this user.")
 
     async def show_warnings(self, member: discord.Member, send_func):
-        count = self.warnings.get(member.id, 0)
-        await send_func(f"📊 {member.mention} has **{count} warnings**.")
+        count = await asyncio.to_thread(self.warnings.count, member.guild.id, member.id)
+        recent = await asyncio.to_thread(self.warnings.recent, member.guild.id, member.id)
+        lines = [f"📊 {member.mention} has **{count} warnings**."]
+        for moderator_id, reason, created_at in recent:
+            by = f" by <@{moderator_id}>" if moderator_id else ""
+            lines.append(f"• <t:{int(created_at)}:R>{by}: {reason}")
+        await send_func("\n".join(lines))
 
     async def clear_warnings(self, member: discord.Member, send_func):
-        if member.id in self.warnings:
-            self.warnings.pop(member.id)
-            self.save_data()
+        if await asyncio.to_thread(self.warnings.clear, member.guild.id, member.id):
             await send_func(f"✅ Cleared all warnings for {member.mention}.")
             await self.log_action(member.guild, f"✅ Cleared warnings for {member}")
         else:
             await send_func(f"ℹ️ {member.mention} has no warnings.")
 
-    # === Auto warnings for banned words ===
+    # === Flood / raid protection ===
+    async def check_flood(self, message: discord.Message):
+        """Pipeline stage: drop messages from users over the rate limit.
+
+        Runs after ``scan_message``, so abusive messages are dealt with
+        first; those are counted there, since they stop the pipeline.
+        """
+        if message.guild is None:
+            return
+        if self.count_flood(message):
+            return pipeline.STOP
+
+    def count_flood(self, message: discord.Message) -> bool:
+        """Count ``message`` towards its author's rate; True once over the
+        limit (the first message over it also queues a timeout)."""
+        flood = self.bot.flood
+        count = flood.record_message(message.guild.id, message.author.id)
+        if count == flood.user_limit + 1:
+            key = (message.guild.id, message.author.id)
+            self.actions.submit(key, lambda: self.flood_timeout(message.author))
+        return count > flood.user_limit
+
+    async def flood_timeout(self, member: discord.Member):
+        seconds = int(os.getenv("FLOOD_TIMEOUT_SECONDS", 300))
+        try:
+            await self.timeout_member(member, seconds, reason="Message flood")
+            await self.log_action(member.guild, f"🔇 {member} auto-muted for {seconds}s (message flood).")
+        except discord.Forbidden:
+            await self.log_action(member.guild, f"⚠️ Could not auto-mute {member} for flooding (missing permissions).")
+
+    def flood_alert(self, guild_id: int, reason: str):
+        guild = self.bot.get_guild(guild_id)
+        channel = guild and self.bot.channel_resolver.resolve(guild, "log")
+        if channel:
+            minutes = int(self.bot.flood.degrade_for // 60)
+            self.bot.outbound.send(
+                channel,
+                f"🚨 {reason.capitalize()} detected: XP and welcome cards paused for {minutes} min.",
+                priority=outbound.MODERATION
+            )
+
     @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot:
+    async def on_member_join(self, member: discord.Member):
+        self.bot.flood.record_join(member.guild.id)
+
+    async def timeout_member(self, member: discord.Member, seconds: int, reason: str):
+        until = discord.utils.utcnow() + datetime.timedelta(seconds=seconds)
+        await member.timeout(until, reason=reason)
+
+    # === Auto warnings for banned words (pipeline stage) ===
+    async def scan_message(self, message: discord.Message):
+        if message.guild is None:
             return
 
-        # Check message for banned words using regex
-        if self.banned_regex.search(message.content):
+        # Check message for banned words (default list + this guild's extras)
+        if self.filters.find(message.guild.id, message.content):
+            key = (message.guild.id, message.author.id)
+            if self.actions.submit(key, lambda: self.punish_message(message)) is None:
+                print(f"⚠️ Moderation queue full, dropped action for {message.author}")
+            # the flood stage won't see it, but it still counts towards the rate
+            self.count_flood(message)
+
+            # the message is being removed: it earns no XP and runs no commands
+            return pipeline.STOP
+
+    @instrument("moderation.punish")
+    async def punish_message(self, message: discord.Message):
+        """Delete, DM and warn concurrently; runs on the action queue."""
+        async def delete():
             try:
                 await message.delete()
+            except discord.NotFound:
+                pass
             except discord.Forbidden:
                 await self.log_action(
                     message.guild,
                     f"⚠️ Could not delete message from {message.author} (missing permissions)."
                 )
 
+        async def notify():
             try:
                 await message.author.send(
                     f"⚠️ Your message in **{message.guild.name}** was deleted because it contained abusive language."
                 )
-            except discord.Forbidden:
+            except discord.HTTPException:
                 pass
 
-            await self.add_warning(
+        results = await asyncio.gather(
+            delete(),
+            notify(),
+            self.add_warning(
                 message.author,
                 reason="Used abusive word",
-                send_func=message.channel.send
+                send_func=lambda msg: self.bot.outbound.send(message.channel, msg, priority=outbound.MODERATION)
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"⚠️ Moderation action failed: {result!r}")
+
+    # === Bulk actions (background jobs) ===
+    async def start_bulk(self, interaction: discord.Interaction, title: str, build, summary):
+        """Run ``await build()`` -> BulkJob in the background, editing the
+        (deferred, ephemeral) response with progress and logging ``summary(job)``."""
+        guild = interaction.guild
+        if guild.id in self.bulk_jobs:
+            return await interaction.followup.send("⏳ Another bulk action is still running in this server.", ephemeral=True)
+
+        async def progress(job: BulkJob):
+            if job.finished < job.total:
+                text = f"⏳ {title}: {job.finished}/{job.total}"
+            else:
+                text = f"✅ {title}: {job.done} done, {job.failed} failed in {job.elapsed:.0f}s"
+            await interaction.edit_original_response(content=text)
+
+        async def runner():
+            try:
+                job = await build()
+                if not job.items:
+                    return await interaction.edit_original_response(content=f"ℹ️ {title}: nothing matched.")
+                job.on_progress = progress
+                await job.run()
+                await self.log_action(guild, summary(job))
+            except Exception as e:
+                print(f"⚠️ {title} failed: {e!r}")
+                try:
+                    await interaction.edit_original_response(content=f"❌ {title} failed: {e}")
+                except discord.HTTPException:
+                    pass
+            finally:
+                self.bulk_jobs.pop(guild.id, None)
+
+        self.bulk_jobs[guild.id] = asyncio.create_task(runner())
+
+    def select_members(self, interaction: discord.Interaction, members: str, joined_within: str | None):
+        """Members named in ``members`` (mentions or IDs) plus everyone who joined
+        within ``joined_within``. Unknown IDs come back as ``discord.Object``."""
+        guild = interaction.guild
+        targets = {}
+        for raw in re.findall(r"\d{15,20}", members or ""):
+            uid = int(raw)
+            targets[uid] = guild.get_member(uid) or discord.Object(id=uid)
+
+        if joined_within:
+            cutoff = discord.utils.utcnow() - datetime.timedelta(seconds=self.parse_duration(joined_within))
+            for member in guild.members:
+                if member.joined_at and member.joined_at >= cutoff:
+                    targets[member.id] = member
+
+        # never act on ourselves, the invoker or the owner
+        for uid in (guild.me.id, interaction.user.id, guild.owner_id):
+            targets.pop(uid, None)
+        return list(targets.values())
+
+    @app_commands.command(name="purge", description="Bulk delete recent messages, optionally by user, regex or time window")
+    @app_commands.guild_only()
+    @app_commands.describe(
+        limit="How many recent messages to scan (max 1000)",
+        user="Only delete this user's messages",
+        pattern="Only delete messages matching this regex",
+        minutes="Only delete messages from the last N minutes",
+    )
+    async def purge_slash(self, interaction: discord.Interaction, limit: app_commands.Range[int, 1, 1000] = 100,
+                          user: discord.Member | None = None, pattern: str | None = None,
+                          minutes: app_commands.Range[int, 1, 20160] | None = None):
+        if not await self.is_moderator(interaction):
+            return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+
+        try:
+            regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+        except re.error as e:
+            return await interaction.response.send_message(f"❌ Invalid pattern: {e}", ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        channel = interaction.channel
+        after = discord.utils.utcnow() - datetime.timedelta(minutes=minutes) if minutes else None
+
+        def matches(msg: discord.Message) -> bool:
+            if user and msg.author.id != user.id:
+                return False
+            return regex is None or regex.search(msg.content) is not None
+
+        async def delete_chunk(chunk: list[discord.Message]):
+            if len(chunk) == 1:
+                try:
+                    await chunk[0].delete()
+                except discord.NotFound:
+                    pass
+            else:
+                await channel.delete_messages(chunk, reason=f"Purge by {interaction.user}")
+
+        async def build():
+            bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_AGE
+            recent, old = [], []
+            async for msg in channel.history(limit=limit, after=after, oldest_first=False):
+                if matches(msg):
+                    (recent if msg.created_at > bulk_cutoff else old).append(msg)
+            chunks = [recent[i:i + BULK_DELETE_MAX] for i in range(0, len(recent), BULK_DELETE_MAX)]
+            chunks += [[msg] for msg in old]
+            return BulkJob("purge", chunks, delete_chunk, weight=len, pace=self.bulk_pace)
+
+        filters = [f"user {user}" if user else "", f"pattern `{pattern}`" if pattern else "",
+                   f"last {minutes} min" if minutes else ""]
+        scope = ", ".join(f for f in filters if f) or f"last {limit} messages"
+        await self.start_bulk(
+            interaction, "Purge", build,
+            lambda job: f"🧹 {interaction.user} purged {job.done} message(s) in {channel.mention} ({scope}); {job.failed} failed."
+        )
+
+    @app_commands.command(name="masstimeout", description="Time out many members at once")
+    @app_commands.guild_only()
+    @app_commands.describe(
+        members="Mentions or IDs, separated by spaces",
+        duration="Timeout length, e.g. 10m, 2h (max 28d)",
+        joined_within="Also include everyone who joined within this window, e.g. 15m",
+    )
+    async def masstimeout_slash(self, interaction: discord.Interaction, duration: str, members: str = "",
+                                joined_within: str | None = None, reason: str = "Mass timeout"):
+        if not await self.is_moderator(interaction):
+            return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+
+        seconds = self.parse_duration(duration)
+        if seconds is None or (joined_within and self.parse_duration(joined_within) is None):
+            return await interaction.response.send_message("❌ Invalid duration format. Use s/m/h/d (e.g., 10m, 2h).", ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        targets = [m for m in self.select_members(interaction, members, joined_within) if isinstance(m, discord.Member)]
+
+        async def build():
+            return BulkJob(
+                "masstimeout", targets, lambda m: self.timeout_member(m, seconds, reason=reason), pace=self.bulk_pace
             )
 
-        await self.bot.process_commands(message)
+        await self.start_bulk(
+            interaction, "Mass timeout", build,
+            lambda job: f"🔇 {interaction.user} timed out {job.done} member(s) for {duration}; {job.failed} failed. Reason: {reason}"
+        )
+
+    @app_commands.command(name="massban", description="Ban many members at once")
+    @app_commands.guild_only()
+    @app_commands.describe(
+        members="Mentions or IDs, separated by spaces",
+        joined_within="Also include everyone who joined within this window, e.g. 15m",
+        delete_days="Delete their messages from the last N days",
+    )
+    async def massban_slash(self, interaction: discord.Interaction, members: str = "", joined_within: str | None = None,
+                            delete_days: app_commands.Range[int, 0, 7] = 0, reason: str = "Mass ban"):
+        if not await self.is_moderator(interaction):
+            return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+        if joined_within and self.parse_duration(joined_within) is None:
+            return await interaction.response.send_message("❌ Invalid duration format. Use s/m/h/d (e.g., 10m, 2h).", ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        guild = interaction.guild
+        targets = self.select_members(interaction, members, joined_within)
+
+        async def ban_chunk(chunk):
+            result = await guild.bulk_ban(chunk, reason=reason, delete_message_seconds=delete_days * 86400)
+            return len(result.banned)
+
+        async def build():
+            chunks = [targets[i:i + BULK_BAN_MAX] for i in range(0, len(targets), BULK_BAN_MAX)]
+            return BulkJob("massban", chunks, ban_chunk, weight=len, pace=self.bulk_pace)
+
+        await self.start_bulk(
+            interaction, "Mass ban", build,
+            lambda job: f"⛔ {interaction.user} banned {job.done} member(s); {job.failed} failed. Reason: {reason}"
+        )
+
+    # === Word filter management ===
+    filter_group = app_commands.Group(name="filter", description="Manage this server's banned words", guild_only=True)
+
+    @filter_group.command(name="add", description="Ban extra words in this server (comma separated)")
+    async def filter_add(self, interaction: discord.Interaction, words: str):
+        if not await self.is_moderator(interaction):
+            return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+
+        added = self.filters.add_words(interaction.guild.id, words.split(","))
+        await interaction.response.send_message(f"✅ Added {len(added)} word(s) to the filter.", ephemeral=True)
+        if added:
+            await self.log_action(interaction.guild, f"🧹 {interaction.user} added {len(added)} word(s) to the filter.")
+
+    @filter_group.command(name="remove", description="Un-ban words previously added in this server")
+    async def filter_remove(self, interaction: discord.Interaction, words: str):
+        if not await self.is_moderator(interaction):
+            return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+
+        removed = self.filters.remove_words(interaction.guild.id, words.split(","))
+        await interaction.response.send_message(f"✅ Removed {len(removed)} word(s) from the filter.", ephemeral=True)
+        if removed:
+            await self.log_action(interaction.guild, f"🧹 {interaction.user} removed {len(removed)} word(s) from the filter.")
+
+    @filter_group.command(name="list", description="Show this server's extra banned words")
+    async def filter_list(self, interaction: discord.Interaction):
+        if not await self.is_moderator(interaction):
+            return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+
+        extra = self.filters.guild_words.get(interaction.guild.id, [])
+        listing = ", ".join(f"||{w}||" for w in extra)[:1800] if extra else "None"
+        await interaction.response.send_message(
+            f"📃 {len(self.filters.default_words)} default words + {len(extra)} server words: {listing}",
+            ephemeral=True
+        )
+
+    # === Channel pinning ===
+    @app_commands.command(name="setchannel", description="Pin the log or welcome channel (leave empty to unpin)")
+    @app_commands.guild_only()
+    async def setchannel_slash(self, interaction: discord.Interaction, kind: Literal["log", "welcome"], channel: discord.TextChannel | None = None):
+        if not await self.is_moderator(interaction):
+            return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+
+        self.bot.channel_resolver.pin(interaction.guild, kind, channel)
+        if channel:
+            await interaction.response.send_message(f"📌 {kind} channel pinned to {channel.mention}.", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"📌 {kind} channel unpinned (matching by name).", ephemeral=True)
 
     # === Slash commands ===
     @app_commands.command(name="warnings", description="Check how many warnings a user has")
+    @app_commands.guild_only()
     async def warnings_slash(self, interaction: discord.Interaction, member: discord.Member = None):
         member = member or interaction.user
         await interaction.response.defer(thinking=True)
         await self.show_warnings(member, lambda msg: interaction.followup.send(msg))
 
     @app_commands.command(name="clearwarnings", description="Clear all warnings for a user")
+    @app_commands.guild_only()
     async def clearwarnings_slash(self, interaction: discord.Interaction, member: discord.Member):
         if not await self.is_moderator(interaction):
             return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
         
         await interaction.response.defer(thinking=True)
-        await self.clear_warnings(member, lambda msg: interaction.followup.send(msg))
+        send = lambda msg: interaction.followup.send(msg)
+        await self.run_for_member(member, lambda: self.clear_warnings(member, send), send)
 
     @app_commands.command(name="warn", description="Warn a user")
+    @app_commands.guild_only()
     async def warn_slash(self, interaction: discord.Interaction, member: discord.Member, *, reason: str = "No reason provided"):
         if not await self.is_moderator(interaction):
             return await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
         
         await interaction.response.defer(thinking=True)
-        await self.add_warning(member, reason, lambda msg: interaction.followup.send(msg))
+        send = lambda msg: interaction.followup.send(msg)
+        await self.run_for_member(member, lambda: self.add_warning(member, reason, send, interaction.user), send)
 
     @app_commands.command(name="mute", description="Mute a user for a certain duration")
     async def mute_slash(self, interaction: discord.Interaction, member: discord.Member, duration: str, *, reason: str = "No reason provided"):
@@ -145,8 +495,7 @@ class Moderation(commands.Cog):
             return await interaction.followup.send("❌ Invalid duration format. Use s/m/h/d (e.g., 10m, 2h).")
 
         try:
-            until = discord.utils.utcnow() + datetime.timedelta(seconds=seconds)
-            await member.timeout(until, reason=reason)
+            await self.timeout_member(member, seconds, reason=reason)
             await interaction.followup.send(f"🔇 {member.mention} has been muted for {duration}. Reason: {reason}")
             await self.log_action(interaction.guild, f"🔇 {member} muted for {duration}. Reason: {reason}")
         except discord.Forbidden:
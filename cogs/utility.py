@@ -1,10 +1,18 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import threading
+import time
+from typing import Literal
+
+from utils.metrics import registry
+from utils.perf import profiler
 
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # the profiler samples the thread running the event loop
+        self.loop_thread = threading.get_ident()
 
     # Prefix ping command
     @commands.command()
@@ -18,7 +26,50 @@ class Utility(commands.Cog):
             f"Pong! 🏓 {round(self.bot.latency * 1000)}ms"
         )
 
-async def setup(bot):
-    await bot.add_cog(Utility(bot))
+    # === Performance report (bot owner only) ===
+    def perf_report(self, limit: int = 15) -> str:
+        rows = []
+        for name in registry.handlers:
+            stats = registry.timings[name]
+            p50, p95, p99 = stats.percentiles(0.5, 0.95, 0.99)
+            rows.append((p99, name, stats.count, p50, p95, stats.max))
+        rows.sort(reverse=True)
+
+        lines = [f"{'handler':<28} {'n':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}  (ms)"]
+        for p99, name, count, p50, p95, worst in rows[:limit]:
+            lines.append(
+                f"{name[-28:]:<28} {count:>6} {p50 * 1000:>7.1f} {p95 * 1000:>7.1f} {p99 * 1000:>7.1f} {worst * 1000:>7.1f}"
+            )
+
+        lag = registry.timings.get("loop.lag")
+        if lag:
+            p50, p99 = lag.percentiles(0.5, 0.99)
+            lines.append(f"\nloop lag: p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, max {lag.max * 1000:.1f} ms")
 
+        slowest = sorted(registry.slow, reverse=True)[:8]
+        if slowest:
+            now = time.time()
+            lines.append(f"\nslowest recent (>{registry.slow_after * 1000:.0f} ms):")
+            for seconds, name, detail, at in slowest:
+                extra = f" [{detail}]" if detail else ""
+                lines.append(f"{seconds * 1000:>8.0f} ms  {name}{extra}  {now - at:.0f}s ago")
+        return "\n".join(lines)
 
+    @app_commands.command(name="perf", description="Handler latencies and profiler (bot owner only)")
+    async def perf_slash(self, interaction: discord.Interaction, profile: Literal["start", "stop", "report"] | None = None):
+        if not await self.bot.is_owner(interaction.user):
+            return await interaction.response.send_message("❌ Only the bot owner can use this.", ephemeral=True)
+
+        if profile == "start":
+            profiler.start(self.loop_thread)
+            return await interaction.response.send_message("🔬 Sampling profiler started.", ephemeral=True)
+        if profile in ("stop", "report"):
+            if profile == "stop":
+                profiler.stop()
+            text = profiler.report()
+        else:
+            text = self.perf_report() if registry.handlers else "No handler timings yet."
+        await interaction.response.send_message(f"```\n{text[:1900]}\n```", ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Utility(bot))
@@ -1,15 +1,87 @@
 import discord
 from discord.ext import commands
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+import asyncio
+import importlib
 import io
 import os
 import traceback
 
+from utils import outbound
+from utils.avatar_cache import AvatarCache
+from utils.coalesce import BurstCoalescer
+from utils.metrics import instrument
+from utils.render_pool import QueueFull, RenderPool
+from utils.startup import timer as startup
+
 class Welcome(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-
-    async def _get_welcome_channel(self, guild: discord.Guild):
+        self.bot.channel_resolver.register("welcome", self._find_welcome_channel)
+        # banners are rendered off the event loop; see utils/render_pool.py
+        self.renderer = RenderPool(
+            "welcome",
+            kind=os.getenv("WELCOME_RENDER_POOL", "thread"),
+            workers=int(os.getenv("WELCOME_RENDER_WORKERS", 2)),
+            max_queue=int(os.getenv("WELCOME_RENDER_QUEUE", 32)),
+        )
+        self.avatars = AvatarCache(
+            max_entries=int(os.getenv("WELCOME_AVATAR_CACHE", 512)),
+            ttl=float(os.getenv("WELCOME_AVATAR_TTL", 3600)),
+            concurrency=int(os.getenv("WELCOME_AVATAR_CONCURRENCY", 8)),
+            timeout=float(os.getenv("WELCOME_AVATAR_TIMEOUT", 2.0)),
+        )
+        # joins close together in one guild are welcomed with a single collage
+        self.bursts = BurstCoalescer(
+            window=int(os.getenv("WELCOME_BURST_WINDOW_MS", 1500)) / 1000,
+            max_batch=int(os.getenv("WELCOME_BURST_MAX", 10)),
+            on_single=self.welcome_member,
+            on_batch=self.welcome_batch,
+        )
+        # utils.welcome_card (and so Pillow) is imported in the background after
+        # load instead of at import time; see cards()
+        self._cards = None
+        self._warmer: asyncio.Task | None = None
+        self.encoding = None
+
+    async def cog_load(self):
+        self.renderer.start()
+        await self.avatars.start()
+        self._warmer = asyncio.create_task(self.warm())
+
+    async def cards(self):
+        """The rendering module, imported off the event loop on first use."""
+        if self._cards is None:
+            module = await asyncio.to_thread(importlib.import_module, "utils.welcome_card")
+            self.encoding = module.EncodeOptions.from_env()
+            self._cards = module
+        return self._cards
+
+    async def warm(self):
+        # import Pillow and decode the banner and fonts before the first join
+        try:
+            with startup.phase("welcome warm-up"):
+                cards = await self.cards()
+                await self.renderer.run(cards.warm)
+        except Exception as exc:
+            print(f"⚠️ Welcome banner warm-up failed: {exc}")
+
+    async def cog_unload(self):
+        if self._warmer:
+            self._warmer.cancel()
+        await self.bursts.close()
+        await self.avatars.close()
+        self.renderer.close()
+
+    async def _fitted_avatar(self, member: discord.Member):
+        asset = member.display_avatar
+        cards = await self.cards()
+        return await self.avatars.get(
+            asset.key,
+            asset.replace(size=256, format="png").url,
+            lambda data: self.renderer.run(cards.fit_avatar, data),
+        )
+
+    def _find_welcome_channel(self, guild: discord.Guild):
         ch = discord.utils.get(guild.text_channels, name="🚪｜welcome")
         if ch:
             return ch
@@ -18,119 +90,84 @@ class Welcome(commands.Cog):
                 return c
         return guild.system_channel
 
-    def _measure_text(self, draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont):
-        try:
-            bbox = draw.textbbox((0, 0), text, font=font)
-            return (bbox[2] - bbox[0], bbox[3] - bbox[1])
-        except Exception:
-            try:
-                return draw.textsize(text, font=font)
-            except Exception:
-                return (len(text) * 10, 20)
-
-    def _draw_gradient_text(self, base_img: Image.Image, pos: tuple[int, int], text: str, font: ImageFont.ImageFont, left_color: tuple, right_color: tuple, shadow: int = 2):
-        draw_base = ImageDraw.Draw(base_img)
-        w, h = self._measure_text(draw_base, text, font)
-        if w <= 0 or h <= 0:
-            return
-
-        x, y = pos
-
-        if shadow:
-            draw_base.text((x + shadow, y + shadow), text, font=font, fill="black")
-
-        mask = Image.new("L", (w, h), 0)
-        draw_mask = ImageDraw.Draw(mask)
-        draw_mask.text((0, 0), text, font=font, fill=255)
-
-        grad = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-        grad_draw = ImageDraw.Draw(grad)
-        for i in range(w):
-            t = i / (w - 1) if w > 1 else 0
-            r = int(left_color[0] * (1 - t) + right_color[0] * t)
-            g = int(left_color[1] * (1 - t) + right_color[1] * t)
-            b = int(left_color[2] * (1 - t) + right_color[2] * t)
-            grad_draw.line([(i, 0), (i, h)], fill=(r, g, b, 255))
-
-        base_img.paste(grad, (x, y), mask)
+    async def _get_welcome_channel(self, guild: discord.Guild):
+        # cached per guild, invalidated on channel/guild updates
+        return self.bot.channel_resolver.resolve(guild, "welcome")
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
+        if self.bot.flood.degraded(member.guild.id):
+            # raid mode: no rendering, just a text line (merged by the scheduler)
+            channel = await self._get_welcome_channel(member.guild)
+            if channel:
+                self.bot.outbound.send(channel, f"👋 Welcome {member.mention}!", priority=outbound.WELCOME)
+            return
+        self.bursts.add(member.guild.id, member)
+
+    @instrument("welcome.member")
+    async def welcome_member(self, member: discord.Member):
         guild = member.guild
         channel = await self._get_welcome_channel(guild)
         if not channel:
             return
 
         try:
-            base_dir = os.path.dirname(os.path.dirname(__file__))
-            banner_path = os.path.join(base_dir, "BANNER2.jpg")
-            font_path = os.path.join(base_dir, "Asgrike.otf")
-
-            if not os.path.exists(banner_path):
-                await channel.send(f"🎉 Welcome {member.mention}! (Banner not found)")
+            cards = await self.cards()
+            if not os.path.exists(cards.BANNER_PATH):
+                await self.bot.outbound.send(channel, f"🎉 Welcome {member.mention}! (Banner not found)", priority=outbound.WELCOME)
                 return
 
-            background = Image.open(banner_path).convert("RGBA")
-            W, H = background.size
+            try:
+                avatar = await self._fitted_avatar(member)
+                data, ext = await self.renderer.run(
+                    cards.render_card, avatar, member.display_name, guild.name, len(guild.members), self.encoding
+                )
+            except QueueFull:
+                # join flood: skip the banner rather than queue without bound
+                await self.bot.outbound.send(channel, f"🎉 Welcome {member.mention} to **{guild.name}**!", priority=outbound.WELCOME)
+                return
 
-            avatar_asset = member.display_avatar.replace(size=256)
-            avatar_bytes = await avatar_asset.read()
-            avatar = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
+            file = discord.File(fp=io.BytesIO(data), filename=f"welcome.{ext}")
 
-            avatar_size = int(H * 0.6)
-            avatar = ImageOps.fit(avatar, (avatar_size, avatar_size), Image.LANCZOS)
+            # ✅ Only one message (banner + text in one)
+            await self.bot.outbound.send(channel, f"🎉 Welcome {member.mention} to **{guild.name}**!", file=file, priority=outbound.WELCOME)
 
-            mask = Image.new("L", avatar.size, 0)
-            ImageDraw.Draw(mask).ellipse((0, 0, avatar_size, avatar_size), fill=255)
+        except Exception as exc:
+            traceback.print_exc()
+            await self.bot.outbound.send(channel, f"👋 Welcome {member.mention}!\n⚠️ (banner failed: {exc})", priority=outbound.WELCOME)
 
-            border = max(4, int(H * 0.02))
-            bordered = Image.new("RGBA", (avatar_size + 2 * border, avatar_size + 2 * border), (0, 0, 0, 0))
-            ring = ImageDraw.Draw(bordered)
-            ring.ellipse((0, 0, bordered.size[0] - 1, bordered.size[1] - 1), fill=(255, 255, 255, 255))
-            bordered.paste(avatar, (border, border), mask)
+    @instrument("welcome.batch")
+    async def welcome_batch(self, members: list[discord.Member]):
+        guild = members[0].guild
+        channel = await self._get_welcome_channel(guild)
+        if not channel:
+            return
 
-            avatar_x = int(W * 0.04)
-            avatar_y = (H - bordered.size[1]) // 2
-            background.paste(bordered, (avatar_x, avatar_y), bordered)
+        mentions = ", ".join(m.mention for m in members)
+        try:
+            cards = await self.cards()
+            if not os.path.exists(cards.BANNER_PATH):
+                await self.bot.outbound.send(channel, f"🎉 Welcome {mentions}! (Banner not found)", priority=outbound.WELCOME)
+                return
 
             try:
-                font_big = ImageFont.truetype(font_path, int(H * 0.14))
-                font_small = ImageFont.truetype(font_path, int(H * 0.07))
-            except Exception:
-                font_big = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-
-            draw = ImageDraw.Draw(background)
-
-            main_text = f"HEY @{member.display_name.upper()}!"
-            subtext = f"WELCOME TO {guild.name.upper()} | YOU ARE OUR {len(guild.members)}TH MEMBER!"
-
-            text_x = avatar_x + bordered.size[0] + int(W * 0.05)
-            main_w, main_h = self._measure_text(draw, main_text, font_big)
-            avatar_center_y = avatar_y + bordered.size[1] // 2
-            text_y = avatar_center_y - main_h // 2 - int(H * 0.04)
-            subtext_y = text_y + main_h + int(H * 0.03)
-
-            self._draw_gradient_text(
-                background, (text_x, text_y), main_text, font_big,
-                left_color=(0, 220, 220), right_color=(255, 255, 255), shadow=3
-            )
-            self._draw_gradient_text(
-                background, (text_x, subtext_y), subtext, font_small,
-                left_color=(0, 220, 220), right_color=(255, 255, 255), shadow=2
-            )
-
-            buf = io.BytesIO()
-            background.save(buf, "PNG")
-            buf.seek(0)
-            file = discord.File(fp=buf, filename="welcome.png")
+                # only the avatars the collage will draw are fetched; the rest are counted
+                shown = members[:cards.MAX_COLLAGE_AVATARS]
+                avatars = await asyncio.gather(*(self._fitted_avatar(m) for m in shown))
+                avatars = list(avatars) + [None] * (len(members) - len(shown))
+                data, ext = await self.renderer.run(
+                    cards.render_collage, avatars, guild.name, len(guild.members), self.encoding
+                )
+            except QueueFull:
+                await self.bot.outbound.send(channel, f"🎉 Welcome {mentions} to **{guild.name}**!", priority=outbound.WELCOME)
+                return
 
-            # ✅ Only one message (banner + text in one)
-            await channel.send(content=f"🎉 Welcome {member.mention} to **{guild.name}**!", file=file)
+            file = discord.File(fp=io.BytesIO(data), filename=f"welcome.{ext}")
+            await self.bot.outbound.send(channel, f"🎉 Welcome {mentions} to **{guild.name}**!", file=file, priority=outbound.WELCOME)
 
         except Exception as exc:
             traceback.print_exc()
-            await channel.send(f"👋 Welcome {member.mention}!\n⚠️ (banner failed: {exc})")
+            await self.bot.outbound.send(channel, f"👋 Welcome {mentions}!\n⚠️ (banner failed: {exc})", priority=outbound.WELCOME)
 
 async def setup(bot):
     await bot.add_cog(Welcome(bot))
@@ -1,17 +1,71 @@
-from flask import Flask
-import threading
+"""HTTP endpoints for the host's health checks, served on the bot's own loop.
+
+    /          plain "Bot is running!" (uptime pingers)
+    /healthz   liveness: the process and its event loop are responsive
+    /readyz    readiness: connected to the gateway with a sane heartbeat
+    /metrics   Prometheus text format from utils.metrics.registry
+"""
+import math
 import os
 
-app = Flask(__name__)
+from aiohttp import web
+
+from utils.metrics import prometheus_text, registry
+
+
+class KeepAlive:
+    def __init__(self, bot, host: str = "0.0.0.0", port: int | None = None,
+                 max_latency: float | None = None):
+        self.bot = bot
+        self.host = host
+        self.port = port or int(os.getenv("PORT", 8080))
+        # readiness fails while the heartbeat round trip is slower than this
+        self.max_latency = max_latency or float(os.getenv("READY_MAX_LATENCY", 5))
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/", self.home)
+        self.app.router.add_get("/healthz", self.healthz)
+        self.app.router.add_get("/readyz", self.readyz)
+        self.app.router.add_get("/metrics", self.metrics)
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"🌐 Health server listening on {self.host}:{self.port}")
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def home(self, request):
+        return web.Response(text="Bot is running!")
 
-@app.route('/')
-def home():
-    return "Bot is running!"
+    async def healthz(self, request):
+        return web.json_response({"status": "ok"})
 
-def run():
-    port = int(os.environ.get("PORT", 10000))
-    app.run(host="0.0.0.0", port=port)
+    async def readyz(self, request):
+        latency = self.bot.latency
+        ready = (
+            self.bot.is_ready()
+            and not self.bot.is_closed()
+            and math.isfinite(latency)
+            and latency <= self.max_latency
+        )
+        body = {
+            "ready": ready,
+            "gateway": "closed" if self.bot.is_closed() else ("ready" if self.bot.is_ready() else "connecting"),
+            "latency": latency if math.isfinite(latency) else None,
+            "guilds": len(self.bot.guilds),
+        }
+        return web.json_response(body, status=200 if ready else 503)
 
-def keep_alive():
-    t = threading.Thread(target=run)
-    t.start()
+    async def metrics(self, request):
+        registry.set_gauge("gateway.latency", self.bot.latency if math.isfinite(self.bot.latency) else -1)
+        registry.set_gauge("gateway.guilds", len(self.bot.guilds))
+        return web.Response(
+            body=prometheus_text().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
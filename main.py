@@ -1,54 +1,179 @@
+# first, so the "imports" phase covers everything below
+from utils.startup import timer as startup
+startup.begin("imports", at=startup.origin)
+
 import os
-import threading
+import sys
+import time
+import signal
+import argparse
 import asyncio
-from flask import Flask
+import subprocess
 import discord
 from discord.ext import commands
 
-# ===== Flask keep-alive =====
-app = Flask(__name__)
-
-@app.route("/")
-def home():
-    return "Bot is running!"
-
-def run_flask():
-    app.run(host="0.0.0.0", port=8080)
+from keep_alive import KeepAlive
+from utils import metrics, services
+from utils.command_sync import sync_if_changed
+from utils.sharding import ShardConfig, recommended_shards, split
 
-threading.Thread(target=run_flask, daemon=True).start()
+startup.end("imports")
 
 # ===== Discord Bot Setup =====
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# SHARD_COUNT / SHARD_IDS pick the shards this process runs (see utils/sharding.py)
+sharding = ShardConfig.from_env()
+if sharding.enabled:
+    bot = commands.AutoShardedBot(command_prefix="!", intents=intents, **sharding.bot_kwargs())
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents)
 
 # --- Use bot.tree instead of creating a new one ---
 tree = bot.tree   # ✅ FIXED
 
+# message pipeline and shared services, the same ones the offline harness uses
+services.install(bot, sharding)
+
+@bot.event
+async def on_message(message):
+    await bot.pipeline.process(message)
+
+# ===== Command sync =====
+# setup_hook runs once per process (after login, before the gateway connects),
+# unlike on_ready which fires again on every reconnect.
+force_sync = False
+
+async def sync_commands():
+    startup.end("login")  # setup_hook is the last step of login()
+    # commands are global, so one worker syncing is enough
+    if not sharding.primary:
+        return
+    try:
+        with startup.phase("command sync"):
+            synced = await sync_if_changed(bot, force=force_sync)
+    except discord.HTTPException as e:
+        print(f"⚠️ Command sync failed: {e}")
+        return
+    if synced:
+        print(f"🔄 Synced commands: {', '.join(synced)}")
+    else:
+        print("✅ Commands unchanged, skipped sync")
+
+bot.setup_hook = sync_commands
+
+@bot.event
+async def on_socket_event_type(event):
+    metrics.registry.inc(f"gateway.events.{event}")
+
 @bot.event
 async def on_ready():
-    # Sync slash commands each time the bot starts
-    await tree.sync()
-    print(f"✅ Logged in as {bot.user} (ID: {bot.user.id})")
+    print(f"✅ Logged in as {bot.user} (ID: {bot.user.id}, {sharding.describe()})")
     print("------")
+    startup.end("ready")
+    if not startup.reported:
+        print(startup.report())
 
-async def load_cogs():
-    """Load all cog extensions."""
-    for ext in ["cogs.utility", "cogs.levels", "cogs.moderation", "cogs.welcome"]:
-        try:
+async def load_cog(ext):
+    try:
+        with startup.phase(f"cog load/{ext}"):
             await bot.load_extension(ext)
-            print(f"Loaded {ext}")
-        except Exception as e:
-            print(f"⚠️ Failed to load {ext}: {e}")
+        print(f"Loaded {ext}")
+    except Exception as e:
+        print(f"⚠️ Failed to load {ext}: {e}")
+
+async def load_cogs():
+    """Load all cog extensions concurrently.
+
+    They only share services set up above (pipeline stages are ordered by
+    priority, not load order), so a slow ``cog_load`` doesn't hold up the
+    others.
+    """
+    with startup.phase("cog load"):
+        await asyncio.gather(*(load_cog(ext) for ext in services.COGS))
 
 async def main():
     async with bot:
-        await load_cogs()
-        await bot.start(os.getenv("DISCORD_TOKEN"))
+        # Render and run_workers stop us with SIGTERM; close like on Ctrl+C so
+        # the cogs unload and Levels flushes its pending XP
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
+        except NotImplementedError:
+            pass  # no loop signal handlers on Windows
+        lag_monitor = asyncio.create_task(metrics.monitor_loop_lag())
+        # health checks and /metrics, served on this loop (see keep_alive.py)
+        web = KeepAlive(bot)
+        await web.start()
+        try:
+            await load_cogs()
+            # Levels may still be reading its store; that overlaps the login
+            with startup.phase("login"):
+                await bot.login(os.getenv("DISCORD_TOKEN"))
+            startup.begin("ready")  # gateway connect until READY
+            await bot.connect()
+        finally:
+            lag_monitor.cancel()
+            await web.close()
+
+# ===== Multi-process sharding =====
+def run_workers(workers, sync, identify_gap, shutdown_timeout):
+    """Start ``workers`` copies of this script, each running a contiguous run
+    of shards, and stop them all when one exits."""
+    count = os.getenv("SHARD_COUNT", "auto").strip().lower()
+    shard_count = asyncio.run(recommended_shards(os.getenv("DISCORD_TOKEN"))) if count == "auto" else int(count)
+    port = int(os.getenv("PORT", 8080))
+    procs = []
+    started = 0
+    # the host stops us with SIGTERM; take the workers down with us
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        for i, shard_ids in enumerate(split(shard_count, workers)):
+            if i:
+                # Discord allows one IDENTIFY per few seconds; let the previous
+                # worker's shards connect before this one starts identifying
+                time.sleep(identify_gap * started)
+            env = dict(os.environ, SHARD_COUNT=str(shard_count),
+                       SHARD_IDS=",".join(map(str, shard_ids)), PORT=str(port + i))
+            args = [sys.executable, os.path.abspath(__file__)]
+            if sync and i == 0:
+                args.append("--sync-commands")
+            procs.append(subprocess.Popen(args, env=env))
+            started = len(shard_ids)
+            print(f"🧩 Worker {i}: shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count}, port {port + i}")
+        while all(p.poll() is None for p in procs):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # SIGTERM: each worker closes its bot and flushes its writes (see main)
+        for p in procs:
+            if p.poll() is None:
+                p.terminate()
+        deadline = time.monotonic() + shutdown_timeout
+        for p in procs:
+            try:
+                p.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                print(f"⚠️ Worker {p.pid} didn't stop in {shutdown_timeout:.0f}s, killing it")
+                p.kill()
+                p.wait()
+    return next((p.returncode for p in procs if p.returncode), 0)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sync-commands", action="store_true", help="sync slash commands even if unchanged")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="run the shards in this many processes (shard count from SHARD_COUNT, default auto)")
+    parser.add_argument("--identify-gap", type=float, default=5.0,
+                        help="seconds per shard to wait before starting the next worker")
+    parser.add_argument("--shutdown-timeout", type=float, default=20.0,
+                        help="seconds workers get to shut down cleanly before they are killed")
+    args = parser.parse_args()
+    if args.workers > 1:
+        sys.exit(run_workers(args.workers, args.sync_commands, args.identify_gap, args.shutdown_timeout))
+    force_sync = args.sync_commands
     asyncio.run(main())
 
 
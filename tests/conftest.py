@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from benchmarks.harness import FakeRest, build_bot
+from utils.metrics import registry
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """Run ``scenario(bot, rest)`` on a fresh harness bot (see benchmarks/harness.py).
+
+    Each test gets its own scratch directory for the databases and a clean
+    metrics registry. ``rest`` defaults to a FakeRest with no latency.
+    """
+    monkeypatch.chdir(tmp_path)
+    registry.__init__()
+
+    def runner(scenario, rest: FakeRest | None = None):
+        async def main():
+            fake = rest or FakeRest(latency=0, jitter=0)
+            await fake.start()
+            bot = await build_bot()
+            try:
+                return await scenario(bot, fake)
+            finally:
+                for ext in list(bot.extensions):
+                    await bot.unload_extension(ext)
+                await fake.close()
+
+        return asyncio.run(main())
+
+    return runner
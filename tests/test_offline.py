@@ -0,0 +1,155 @@
+"""End-to-end behaviour of the real cogs on the offline harness stubs."""
+from benchmarks.harness import FakeRest, Guild, Interaction, Message, settle
+from cogs.levels import DAILY_REWARD
+from utils.metrics import registry
+
+
+def claims(rest):
+    return [content for _, content in rest.sent if content and content.startswith("🎁")]
+
+
+def test_banned_word_is_deleted_and_warned_without_xp_or_command(run):
+    async def scenario(bot, rest):
+        guild = Guild(rest, "guild", bot)
+        member = guild.add_member()
+        await bot.pipeline.process(Message(guild.text_channels[0], member, "!daily you sh!t"))
+        await settle(bot)
+
+        assert rest.calls["message.delete"] == 1
+        assert bot.get_cog("Moderation").warnings.count(guild.id, member.id) == 1
+        assert any(content and "has been warned" in content for _, content in rest.sent)
+        assert bot.get_cog("Levels")._table(guild.id).get_xp(member.id) == 0
+        assert "command.daily" not in registry.timings
+        assert not claims(rest)
+
+    run(scenario)
+
+
+def test_prefix_command_is_dispatched_once(run):
+    async def scenario(bot, rest):
+        guild = Guild(rest, "guild", bot)
+        member = guild.add_member()
+        await bot.pipeline.process(Message(guild.text_channels[0], member, "!daily"))
+        await settle(bot)
+
+        assert registry.timings["command.daily"].count == 1
+        assert len(claims(rest)) == 1
+
+    run(scenario)
+
+
+def test_join_burst_sends_one_collage(run, monkeypatch):
+    monkeypatch.setenv("WELCOME_BURST_WINDOW_MS", "100")
+
+    async def scenario(bot, rest):
+        guild = Guild(rest, "guild", bot)
+        members = [guild.add_member() for _ in range(5)]
+        for member in members:
+            bot.dispatch("member_join", member)
+        await settle(bot)
+
+        # the first join after a quiet spell is welcomed on its own, the rest
+        # of the burst in a single collage
+        assert rest.calls["channel.send"] == 2
+        (_, single), (_, collage) = rest.sent
+        assert single.startswith("🎉 Welcome") and members[0].mention in single
+        assert collage.startswith("🎉 Welcome")
+        assert all(m.mention in collage for m in members[1:])
+        assert rest.calls["cdn.avatar"] == len(members)
+
+    run(scenario)
+
+
+def test_rate_limited_send_is_retried(run):
+    # most calls are answered 429 first; each one must still land exactly once
+    rest = FakeRest(latency=0, jitter=0, rate_limit=0.9, retry_after=0)
+
+    async def scenario(bot, rest):
+        guild = Guild(rest, "guild", bot)
+        member = guild.add_member()
+        await bot.pipeline.process(Message(guild.text_channels[0], member, "!daily"))
+        await settle(bot)
+
+        assert rest.throttled["channel.send"] > 0
+        assert len(claims(rest)) == 1
+
+    run(scenario, rest)
+
+
+def test_second_daily_in_a_day_is_refused(run):
+    async def scenario(bot, rest):
+        guild = Guild(rest, "guild", bot)
+        member = guild.add_member()
+        channel = guild.text_channels[0]
+        levels = bot.get_cog("Levels")
+        first, second = Interaction(member, channel), Interaction(member, channel)
+        await levels.daily_slash.callback(levels, first)
+        await levels.daily_slash.callback(levels, second)
+        await levels.writer.flush()
+
+        assert first.replies[0].startswith("🎁")
+        assert second.replies[0].startswith("⏳")
+        assert levels._table(guild.id).get_xp(member.id) == DAILY_REWARD
+        stored = {(gid, uid): xp for gid, uid, xp, _, _ in levels.store.load()}
+        assert stored[(guild.id, member.id)] == DAILY_REWARD
+
+    run(scenario)
+
+
+def test_leaderboard_skips_and_unranks_departed_members(run):
+    async def scenario(bot, rest):
+        guild = Guild(rest, "guild", bot)
+        members = [guild.add_member() for _ in range(14)]
+        levels = bot.get_cog("Levels")
+        for i, member in enumerate(members):
+            levels._add_xp(guild.id, member.id, 1000 - i)
+        # the top two leave while the bot is offline (no on_member_remove)
+        for member in members[:2]:
+            guild.remove_member(member.id)
+
+        rows = levels.leaderboard_page(guild, 1)
+        assert [member for _, member, _ in rows] == members[2:12]
+        assert [rank for rank, _, _ in rows] == list(range(1, 11))
+        index = levels._rank_index(guild.id)
+        assert all(index.rank(member.id) == rank for rank, member, _ in rows)
+        assert [member for _, member, _ in levels.leaderboard_page(guild, 2)] == members[12:]
+
+    run(scenario)
+
+
+def test_first_message_after_legacy_claim_is_not_a_level_up(run):
+    async def scenario(bot, rest):
+        guild = Guild(rest, "guild", bot)
+        member = guild.add_member()
+        levels = bot.get_cog("Levels")
+        levels.legacy[member.id] = (5000, None, [])
+        await bot.pipeline.process(Message(guild.text_channels[0], member, "hello"))
+        await settle(bot)
+
+        assert levels._table(guild.id).get_xp(member.id) == 5010
+        assert not any(content and "leveled up" in content for _, content in rest.sent)
+        assert rest.calls["member.add_roles"] == 0
+
+    run(scenario)
+
+
+def test_flooded_abuse_is_still_deleted_and_warned(run, monkeypatch):
+    monkeypatch.setenv("FLOOD_USER_LIMIT", "1")
+
+    async def scenario(bot, rest):
+        guild = Guild(rest, "guild", bot)
+        member = guild.add_member()
+        channel = guild.text_channels[0]
+        for _ in range(3):
+            await bot.pipeline.process(Message(channel, member, "you sh!t"))
+        await bot.pipeline.process(Message(channel, member, "!daily"))
+        await settle(bot)
+
+        assert rest.calls["message.delete"] == 3
+        assert bot.get_cog("Moderation").warnings.count(guild.id, member.id) == 3
+        assert rest.calls["member.timeout"] == 1
+        # over the limit: the clean message earns nothing and runs nothing
+        assert bot.get_cog("Levels")._table(guild.id).get_xp(member.id) == 0
+        assert "command.daily" not in registry.timings
+
+    run(scenario)
@@ -0,0 +1,110 @@
+"""Bounded asyncio work queue with per-key ordering.
+
+Jobs are ``async`` callables submitted under a key (for moderation, the
+``(guild_id, user_id)`` pair). Jobs with the same key run one after
+another in submit order; jobs with different keys run concurrently on up
+to ``workers`` tasks. ``submit`` never blocks: once ``max_pending`` jobs
+are waiting it refuses new ones and counts the rejection.
+"""
+import asyncio
+import time
+import traceback
+from collections import deque
+
+from utils.metrics import registry
+
+
+def _consume(fut: asyncio.Future) -> None:
+    # fire-and-forget jobs: the worker already printed the traceback
+    if not fut.cancelled():
+        fut.exception()
+
+
+class ActionQueue:
+    def __init__(self, name: str, workers: int = 4, max_pending: int = 1000):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.active = 0
+        self.rejected = 0
+        self._lanes: dict[object, deque] = {}
+        self._ready: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._ready = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Let queued jobs finish (up to ``timeout`` seconds), then stop."""
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, key, job) -> asyncio.Future | None:
+        """Queue ``job()`` behind earlier jobs for ``key``.
+
+        Returns a future for the job's result, or None if the queue is full.
+        """
+        if self._ready is None:
+            raise RuntimeError(f"{self.name} queue is not started")
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            registry.inc(f"actions.{self.name}.rejected")
+            return None
+
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(_consume)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = deque()
+            self._ready.put_nowait(key)
+        lane.append((job, fut, time.perf_counter()))
+        self.pending += 1
+        self._report()
+        return fut
+
+    def _report(self) -> None:
+        registry.set_gauge(f"actions.{self.name}.pending", self.pending)
+        registry.set_gauge(f"actions.{self.name}.active", self.active)
+
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            lane = self._lanes[key]
+            job, fut, queued_at = lane.popleft()
+
+            start = time.perf_counter()
+            registry.observe(f"actions.{self.name}.wait", start - queued_at)
+            self.active += 1
+            self._report()
+            try:
+                result = await job()
+            except asyncio.CancelledError:
+                fut.cancel()
+                raise
+            except Exception as e:
+                traceback.print_exc()
+                registry.inc(f"actions.{self.name}.errors")
+                if not fut.done():
+                    fut.set_exception(e)
+            else:
+                if not fut.done():
+                    fut.set_result(result)
+            finally:
+                registry.observe(f"actions.{self.name}.run", time.perf_counter() - start)
+                self.active -= 1
+                self.pending -= 1
+                # one job per turn keeps a busy user from starving the rest
+                if lane:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._lanes[key]
+                self._report()
@@ -0,0 +1,100 @@
+"""LRU cache of fitted avatar images with a bounded, shared fetcher.
+
+Keys are Discord avatar hashes, so rejoins and accounts on the same
+default avatar share one entry. Entries expire after ``ttl`` seconds and
+the cache holds at most ``max_entries``. Fetches go through one aiohttp
+session, at most ``concurrency`` at a time, and concurrent requests for
+the same key share a single fetch. A fetch that misses the ``timeout``
+budget returns None so the caller can draw a placeholder.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+from utils.metrics import registry
+
+
+class AvatarCache:
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0,
+                 concurrency: int = 8, timeout: float = 2.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.timeout = timeout
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._limit = asyncio.Semaphore(concurrency)
+        self.session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _lookup(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, image = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return image
+
+    def _store(self, key: str, image) -> None:
+        self._entries[key] = (time.monotonic(), image)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _fetch(self, url: str) -> bytes:
+        async with self._limit:
+            async with self.session.get(url) as resp:
+                resp.raise_for_status()
+                return await resp.read()
+
+    async def get(self, key: str, url: str, fit):
+        """Return the fitted avatar for ``key``; ``fit`` is ``async (bytes) -> image``."""
+        image = self._lookup(key)
+        if image is not None:
+            registry.inc("avatars.hits")
+            return image
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            registry.inc("avatars.shared")
+            return await asyncio.shield(pending)
+
+        registry.inc("avatars.misses")
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            await self.start()
+            start = time.perf_counter()
+            try:
+                data = await asyncio.wait_for(self._fetch(url), timeout=self.timeout)
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                registry.inc("avatars.fetch_failed")
+                print(f"⚠️ Avatar fetch failed ({type(e).__name__}), using placeholder")
+                image = None
+            else:
+                registry.observe("avatars.fetch", time.perf_counter() - start)
+                image = await fit(data)
+                self._store(key, image)
+            fut.set_result(image)
+            return image
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # waiters re-raise; don't warn if there were none
+            raise
+        finally:
+            self._inflight.pop(key, None)
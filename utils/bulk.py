@@ -0,0 +1,76 @@
+"""Paced background jobs for bulk moderation (purge, mass timeout/ban).
+
+A ``BulkJob`` works through its items one ``step`` at a time, sleeping
+``pace`` seconds between steps so a long job leaves room in the rate-limit
+buckets for everything else the bot is doing. Progress is reported through
+``on_progress`` at most every ``report_every`` seconds and once at the end.
+A failing step is counted and the job moves on.
+"""
+import asyncio
+import time
+import traceback
+
+from utils.metrics import registry
+
+
+class BulkJob:
+    def __init__(self, name: str, items, step, *, weight=None, pace: float = 0.5,
+                 on_progress=None, report_every: float = 3.0):
+        self.name = name
+        self.items = list(items)
+        self.step = step
+        # how many units one item stands for (e.g. a chunk of 100 messages)
+        self.weight = weight or (lambda item: 1)
+        self.pace = pace
+        self.on_progress = on_progress
+        self.report_every = report_every
+        self.total = sum(self.weight(item) for item in self.items)
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    @property
+    def finished(self) -> int:
+        return self.done + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    async def _report(self):
+        if self.on_progress is None:
+            return
+        try:
+            await self.on_progress(self)
+        except Exception as e:
+            print(f"⚠️ Progress update for {self.name} failed: {e}")
+
+    async def run(self) -> "BulkJob":
+        self.started = time.perf_counter()
+        next_report = self.started + self.report_every
+        for i, item in enumerate(self.items):
+            if i:
+                await asyncio.sleep(self.pace)
+            units = self.weight(item)
+            try:
+                result = await self.step(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                traceback.print_exc()
+                self.failed += units
+            else:
+                # a step may report partial success (e.g. some bans refused)
+                ok = units if result is None else result
+                self.done += ok
+                self.failed += units - ok
+
+            if time.perf_counter() >= next_report:
+                next_report = time.perf_counter() + self.report_every
+                await self._report()
+
+        registry.inc(f"bulk.{self.name}.done", self.done)
+        registry.inc(f"bulk.{self.name}.failed", self.failed)
+        registry.observe(f"bulk.{self.name}.duration", self.elapsed)
+        await self._report()
+        return self
@@ -0,0 +1,84 @@
+"""Shared per-guild channel lookup cache.
+
+Cogs register a finder per channel kind (``"log"``, ``"welcome"``, ...).
+``resolve`` returns a pinned channel from ``GuildConfig``
+(``<kind>_channel_id``) if one is set, otherwise the finder's answer,
+and caches the resulting channel id (or the lack of one). A guild's
+entries are dropped whenever one of its channels is created, deleted or
+updated, or the guild itself changes.
+"""
+from utils.metrics import registry
+
+MISSING = 0  # cached "no such channel"
+
+
+class ChannelResolver:
+    def __init__(self, bot, config):
+        self.bot = bot
+        self.config = config
+        self.finders = {}
+        self._cache: dict[int, dict[str, int]] = {}
+        bot.add_listener(self._channel_changed, "on_guild_channel_create")
+        bot.add_listener(self._channel_changed, "on_guild_channel_delete")
+        bot.add_listener(self._channel_updated, "on_guild_channel_update")
+        bot.add_listener(self._guild_changed, "on_guild_update")
+        bot.add_listener(self._guild_removed, "on_guild_remove")
+
+    def register(self, kind: str, finder) -> None:
+        """``finder(guild)`` returns the channel to use for ``kind`` or None."""
+        self.finders[kind] = finder
+        self.invalidate(kind=kind)
+
+    def resolve(self, guild, kind: str):
+        entries = self._cache.setdefault(guild.id, {})
+        cached = entries.get(kind)
+        if cached is not None:
+            if cached == MISSING:
+                registry.inc("channels.hits")
+                return None
+            channel = guild.get_channel(cached)
+            if channel is not None:
+                registry.inc("channels.hits")
+                return channel
+
+        registry.inc("channels.misses")
+        channel = None
+        pinned = self.config.get(guild.id, f"{kind}_channel_id")
+        if pinned:
+            channel = guild.get_channel(pinned)
+        if channel is None and kind in self.finders:
+            channel = self.finders[kind](guild)
+        entries[kind] = channel.id if channel else MISSING
+        return channel
+
+    def pin(self, guild, kind: str, channel) -> None:
+        """Pin ``kind`` to ``channel`` for ``guild`` (None to go back to name matching)."""
+        self.config.set(guild.id, f"{kind}_channel_id", channel.id if channel else None)
+        self.invalidate(guild.id)
+
+    def invalidate(self, guild_id: int | None = None, kind: str | None = None) -> None:
+        if guild_id is not None and kind is None:
+            self._cache.pop(guild_id, None)
+            return
+        guilds = [guild_id] if guild_id is not None else list(self._cache)
+        for gid in guilds:
+            entries = self._cache.get(gid)
+            if entries is None:
+                continue
+            if kind is None:
+                entries.clear()
+            else:
+                entries.pop(kind, None)
+
+    # --- event hooks ---
+    async def _channel_changed(self, channel):
+        self.invalidate(channel.guild.id)
+
+    async def _channel_updated(self, before, after):
+        self.invalidate(after.guild.id)
+
+    async def _guild_changed(self, before, after):
+        self.invalidate(after.id)
+
+    async def _guild_removed(self, guild):
+        self.invalidate(guild.id)
@@ -0,0 +1,66 @@
+"""Coalesce bursts of events per key.
+
+An event arriving when its key has been quiet for ``window`` seconds is
+handed to ``on_single`` straight away, so low traffic sees no delay. An
+event arriving within ``window`` of the previous one starts (or joins) a
+batch, which is handed to ``on_batch`` once ``window`` has passed since
+the batch opened or ``max_batch`` items are waiting. Handlers are async
+and run as tasks, so ``add`` never blocks.
+"""
+import asyncio
+import time
+
+
+class BurstCoalescer:
+    def __init__(self, window: float, max_batch: int, on_single, on_batch):
+        self.window = window
+        self.max_batch = max_batch
+        self.on_single = on_single
+        self.on_batch = on_batch
+        self._last: dict[object, float] = {}
+        self._pending: dict[object, list] = {}
+        self._timers: dict[object, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def add(self, key, item) -> None:
+        now = time.monotonic()
+        last = self._last.get(key)
+        self._last[key] = now
+
+        batch = self._pending.get(key)
+        if batch is not None:
+            batch.append(item)
+            if len(batch) >= self.max_batch:
+                self.flush(key)
+            return
+
+        if self.window <= 0 or last is None or now - last >= self.window:
+            self._spawn(self.on_single(item))
+            return
+
+        self._pending[key] = [item]
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(self.window, self.flush, key)
+
+    def flush(self, key) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        if len(batch) == 1:
+            self._spawn(self.on_single(batch[0]))
+        else:
+            self._spawn(self.on_batch(batch))
+
+    async def close(self) -> None:
+        for key in list(self._pending):
+            self.flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
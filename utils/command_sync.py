@@ -0,0 +1,85 @@
+"""Sync application commands only when the command tree changed.
+
+``on_ready`` runs again after every gateway reconnect, and a full
+``tree.sync()`` each time burns through Discord's (low) sync rate limit.
+Instead the tree is fingerprinted after the cogs are loaded -- one hash
+for global commands and one per guild with guild-scoped commands -- and
+compared with the hashes saved after the last successful sync. Only
+scopes whose hash changed are synced, once per process.
+
+Hashes are stored per application id, so pointing the bot at another
+application's token syncs from scratch.
+"""
+import hashlib
+import json
+import os
+
+import discord
+
+from utils.xp_store import atomic_write_json
+
+STATE_FILE = "command_sync.json"
+GLOBAL = "global"
+
+
+def _digest(payload) -> str:
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _scoped_guild_ids(tree: discord.app_commands.CommandTree) -> set[int]:
+    # the tree has no public way to list the guilds it holds commands for
+    ids = set(tree._guild_commands)
+    ids.update(guild_id for _, guild_id, _ in tree._context_menus if guild_id is not None)
+    return ids
+
+
+def fingerprint(tree: discord.app_commands.CommandTree, guild_id: int | None = None) -> str:
+    guild = discord.Object(id=guild_id) if guild_id is not None else None
+    payload = sorted(
+        (cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)),
+        key=lambda c: (c.get("type", 1), c["name"]),
+    )
+    return _digest(payload)
+
+
+def _load(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+async def sync_if_changed(bot, force: bool = False, path: str = STATE_FILE) -> list[str]:
+    """Sync the scopes whose fingerprint differs from the saved one.
+
+    Returns the synced scopes (``"global"`` or guild ids as strings).
+    """
+    tree = bot.tree
+    state = _load(path)
+    app_key = str(bot.application_id)
+    saved = state.get(app_key, {})
+
+    current = {GLOBAL: fingerprint(tree)}
+    for guild_id in _scoped_guild_ids(tree):
+        current[str(guild_id)] = fingerprint(tree, guild_id)
+    # guilds that had commands last time but not now need a sync to clear them
+    for scope in saved:
+        if scope not in current:
+            current[scope] = fingerprint(tree, int(scope))
+
+    synced = []
+    for scope, digest in current.items():
+        if not force and saved.get(scope) == digest:
+            continue
+        guild = None if scope == GLOBAL else discord.Object(id=int(scope))
+        await tree.sync(guild=guild)
+        saved[scope] = digest
+        synced.append(scope)
+        # save after each scope so a failure later doesn't redo this one
+        state[app_key] = saved
+        atomic_write_json(path, state)
+    return synced
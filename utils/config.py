@@ -0,0 +1,41 @@
+"""Per-guild settings stored in ``guild_config.json``.
+
+Layout: ``{"<guild_id>": {"log_channel_id": 123, ...}}``. Values are
+plain JSON; unknown keys are kept so cogs can add their own settings.
+
+With several shard workers each process only changes the guilds it owns,
+so a save re-reads the file and replaces just that guild's entry instead
+of writing back its own (possibly stale) copy of the others.
+"""
+import json
+import os
+
+from utils.xp_store import atomic_write_json
+
+CONFIG_FILE = "guild_config.json"
+
+
+class GuildConfig:
+    def __init__(self, path: str = CONFIG_FILE):
+        self.path = path
+        self.data: dict[int, dict] = self._read()
+
+    def _read(self) -> dict[int, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as f:
+            return {int(k): v for k, v in json.load(f).items()}
+
+    def get(self, guild_id: int, key: str, default=None):
+        return self.data.get(guild_id, {}).get(key, default)
+
+    def set(self, guild_id: int, key: str, value) -> None:
+        """Set (or with ``value=None`` remove) a setting and save."""
+        settings = self.data.setdefault(guild_id, {})
+        if value is None:
+            settings.pop(key, None)
+        else:
+            settings[key] = value
+        on_disk = self._read()
+        on_disk[guild_id] = settings
+        atomic_write_json(self.path, {str(k): v for k, v in on_disk.items()})
@@ -0,0 +1,122 @@
+"""Bounded-memory message-flood and join-raid detector.
+
+Rates are kept in ``RingCounter``s: a fixed ring of per-tick counts, so
+recording an event is O(1) and each counter is a few dozen bytes. Per-user
+counters live in an LRU capped at ``max_users`` entries; per-guild
+counters are one per guild.
+
+When a guild's message rate or join rate crosses its limit the guild is
+"degraded" for ``degrade_for`` seconds. Levels stops awarding XP and
+Welcome sends plain-text welcomes while a guild is degraded.
+"""
+import os
+import time
+from array import array
+from collections import OrderedDict
+
+
+class RingCounter:
+    """Event count over the last ``len(counts)`` ticks."""
+
+    __slots__ = ("counts", "tick", "total")
+
+    def __init__(self, slots: int, tick: int):
+        self.counts = array("I", bytes(4 * slots))
+        self.tick = tick
+        self.total = 0
+
+    def add(self, tick: int, amount: int = 1) -> int:
+        counts = self.counts
+        slots = len(counts)
+        gap = tick - self.tick
+        if gap >= slots:
+            for i in range(slots):
+                counts[i] = 0
+            self.total = 0
+        else:
+            for t in range(self.tick + 1, tick + 1):
+                i = t % slots
+                self.total -= counts[i]
+                counts[i] = 0
+        if gap > 0:
+            self.tick = tick
+        counts[tick % slots] += amount
+        self.total += amount
+        return self.total
+
+
+class FloodDetector:
+    SLOTS = 10  # ring size; each window is split into this many ticks
+
+    def __init__(self, user_limit: int = 8, user_window: float = 5.0,
+                 guild_limit: int = 150, guild_window: float = 10.0,
+                 join_limit: int = 10, join_window: float = 10.0,
+                 degrade_for: float = 300.0, max_users: int = 50_000):
+        self.user_limit = user_limit
+        self.guild_limit = guild_limit
+        self.join_limit = join_limit
+        self.degrade_for = degrade_for
+        self.max_users = max_users
+        self._user_tick = user_window / self.SLOTS
+        self._guild_tick = guild_window / self.SLOTS
+        self._join_tick = join_window / self.SLOTS
+        self._users: OrderedDict[tuple[int, int], RingCounter] = OrderedDict()
+        self._guild_msgs: dict[int, RingCounter] = {}
+        self._guild_joins: dict[int, RingCounter] = {}
+        self._degraded_until: dict[int, float] = {}
+        # called as on_degrade(guild_id, reason) when a guild enters degraded mode
+        self.on_degrade = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            user_limit=int(os.getenv("FLOOD_USER_LIMIT", 8)),
+            user_window=float(os.getenv("FLOOD_USER_WINDOW", 5)),
+            guild_limit=int(os.getenv("FLOOD_GUILD_LIMIT", 150)),
+            guild_window=float(os.getenv("FLOOD_GUILD_WINDOW", 10)),
+            join_limit=int(os.getenv("FLOOD_JOIN_LIMIT", 10)),
+            join_window=float(os.getenv("FLOOD_JOIN_WINDOW", 10)),
+            degrade_for=float(os.getenv("FLOOD_DEGRADE_SECONDS", 300)),
+            max_users=int(os.getenv("FLOOD_MAX_TRACKED_USERS", 50_000)),
+        )
+
+    @staticmethod
+    def _bump(table, key, tick_len: float, now: float) -> int:
+        tick = int(now / tick_len)
+        counter = table.get(key)
+        if counter is None:
+            counter = table[key] = RingCounter(FloodDetector.SLOTS, tick)
+        return counter.add(tick)
+
+    def record_message(self, guild_id: int, user_id: int) -> int:
+        """Count a message; returns the user's messages in the current window."""
+        now = time.monotonic()
+        key = (guild_id, user_id)
+        count = self._bump(self._users, key, self._user_tick, now)
+        self._users.move_to_end(key)
+        if len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+        if self._bump(self._guild_msgs, guild_id, self._guild_tick, now) > self.guild_limit:
+            self._degrade(guild_id, "message flood", now)
+        return count
+
+    def record_join(self, guild_id: int) -> None:
+        now = time.monotonic()
+        if self._bump(self._guild_joins, guild_id, self._join_tick, now) > self.join_limit:
+            self._degrade(guild_id, "join raid", now)
+
+    def _degrade(self, guild_id: int, reason: str, now: float) -> None:
+        was_degraded = self.degraded(guild_id, now)
+        self._degraded_until[guild_id] = now + self.degrade_for
+        if not was_degraded and self.on_degrade:
+            self.on_degrade(guild_id, reason)
+
+    def degraded(self, guild_id: int, now: float | None = None) -> bool:
+        until = self._degraded_until.get(guild_id)
+        if until is None:
+            return False
+        if (now or time.monotonic()) >= until:
+            del self._degraded_until[guild_id]
+            return False
+        return True
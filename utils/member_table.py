@@ -0,0 +1,98 @@
+"""Compact per-guild member state for the Levels cog.
+
+One ``MemberTable`` per guild holds, for every tracked user, a slot in
+parallel typed arrays:
+
+    ids    array('Q')  user id (0 marks a free slot)
+    xp     array('q')  total XP
+    daily  array('d')  last /daily claim, Unix seconds (0 = never)
+    roles  array('I')  earned milestone roles as a bitmask
+
+``slots`` maps user id -> slot; freed slots are reused. Compared with the
+old ``{uid: int}``, ``{uid: datetime}`` and ``{uid: [role names]}`` dicts,
+this keeps one dict entry per user instead of three and no per-user
+datetime, list or boxed XP objects (see benchmarks/bench_member_table.py).
+Role bits index into the cog's sorted milestone levels.
+"""
+from array import array
+
+
+class MemberTable:
+    __slots__ = ("slots", "ids", "xp", "daily", "roles", "_free")
+
+    def __init__(self):
+        self.slots: dict[int, int] = {}
+        self.ids = array("Q")
+        self.xp = array("q")
+        self.daily = array("d")
+        self.roles = array("I")
+        self._free: list[int] = []
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, user_id):
+        return user_id in self.slots
+
+    def slot(self, user_id: int) -> int:
+        """Slot for ``user_id``, allocating a zeroed one if needed."""
+        slot = self.slots.get(user_id)
+        if slot is not None:
+            return slot
+        if self._free:
+            slot = self._free.pop()
+            self.ids[slot] = user_id
+        else:
+            slot = len(self.ids)
+            self.ids.append(user_id)
+            self.xp.append(0)
+            self.daily.append(0.0)
+            self.roles.append(0)
+        self.slots[user_id] = slot
+        return slot
+
+    def remove(self, user_id: int) -> None:
+        slot = self.slots.pop(user_id, None)
+        if slot is None:
+            return
+        self.ids[slot] = 0
+        self.xp[slot] = 0
+        self.daily[slot] = 0.0
+        self.roles[slot] = 0
+        self._free.append(slot)
+
+    # --- XP ---
+    def get_xp(self, user_id: int, default: int = 0) -> int:
+        slot = self.slots.get(user_id)
+        return default if slot is None else self.xp[slot]
+
+    def add_xp(self, user_id: int, amount: int) -> int:
+        slot = self.slot(user_id)
+        self.xp[slot] += amount
+        return self.xp[slot]
+
+    def set_xp(self, user_id: int, xp: int) -> None:
+        self.xp[self.slot(user_id)] = xp
+
+    def xp_items(self):
+        """``(user_id, xp)`` for every tracked user."""
+        xp = self.xp
+        return ((uid, xp[slot]) for uid, slot in self.slots.items())
+
+    # --- daily ---
+    def get_daily(self, user_id: int) -> float | None:
+        slot = self.slots.get(user_id)
+        if slot is None or not self.daily[slot]:
+            return None
+        return self.daily[slot]
+
+    def set_daily(self, user_id: int, timestamp: float) -> None:
+        self.daily[self.slot(user_id)] = timestamp
+
+    # --- milestone roles ---
+    def get_roles(self, user_id: int) -> int:
+        slot = self.slots.get(user_id)
+        return 0 if slot is None else self.roles[slot]
+
+    def add_roles(self, user_id: int, mask: int) -> None:
+        self.roles[self.slot(user_id)] |= mask
@@ -0,0 +1,162 @@
+"""Tiny in-process metrics registry shared by the bot and its cogs.
+
+Counters, gauges and timing summaries are keyed by a dotted name such as
+``pipeline.stage.xp``. Nothing here does I/O; other code reads
+``registry`` to report the numbers.
+
+Handlers are timed with ``event()`` (directly, through ``timer()`` or the
+``instrument`` decorator); those also land in ``slow`` when they take
+longer than ``PERF_SLOW_MS``.
+"""
+import asyncio
+import functools
+import os
+import time
+from array import array
+from collections import deque
+from contextlib import contextmanager
+
+SAMPLE_SIZE = 512  # recent samples kept per timing for percentiles
+
+
+class TimingStats:
+    __slots__ = ("count", "total", "max", "samples", "_next")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = array("d")
+        self._next = 0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(seconds)
+        else:
+            self.samples[self._next] = seconds
+            self._next = (self._next + 1) % SAMPLE_SIZE
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(self, *qs: float) -> list[float]:
+        """Nearest-rank percentiles (0-1) over the recent samples."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [0.0 for _ in qs]
+        last = len(ordered) - 1
+        return [ordered[min(last, int(q * len(ordered)))] for q in qs]
+
+
+class Registry:
+    def __init__(self):
+        self.counters: dict[str, int] = {}
+        self.gauges: dict[str, float] = {}
+        self.timings: dict[str, TimingStats] = {}
+        self.handlers: set[str] = set()  # timings recorded through event()
+        self.slow_after = int(os.getenv("PERF_SLOW_MS", 250)) / 1000
+        # (seconds, name, detail, unix time) of recent slow handler runs
+        self.slow: deque[tuple[float, str, str | None, float]] = deque(maxlen=50)
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        stats = self.timings.get(name)
+        if stats is None:
+            stats = self.timings[name] = TimingStats()
+        stats.add(seconds)
+
+    def event(self, name: str, seconds: float, detail: str | None = None) -> None:
+        """Time one handler run; slow ones are also kept in ``slow``."""
+        self.observe(name, seconds)
+        self.handlers.add(name)
+        if seconds >= self.slow_after:
+            self.slow.append((seconds, name, detail, time.time()))
+
+    @contextmanager
+    def timer(self, name: str, detail: str | None = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.event(name, time.perf_counter() - start, detail)
+
+
+registry = Registry()
+
+
+def instrument(name: str):
+    """Time every call of an async handler (listener, command, job) as ``name``.
+
+    Apply it under ``@commands.Cog.listener()`` / ``@app_commands.command``.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                registry.event(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _metric_name(prefix: str, name: str) -> str:
+    cleaned = "".join(ch if ch.isalnum() else "_" for ch in name)
+    return f"{prefix}_{cleaned}"
+
+
+def prometheus_text(reg: Registry = registry, prefix: str = "bot") -> str:
+    """Render ``reg`` in the Prometheus text exposition format.
+
+    Counters become ``<name>_total``, timings a summary in seconds
+    (``_count``/``_sum``) plus a ``_max`` gauge, and every ``<x>.hits`` /
+    ``<x>.misses`` counter pair also gets a ``<x>_hit_ratio`` gauge.
+    """
+    lines = []
+    for name, value in sorted(reg.counters.items()):
+        metric = _metric_name(prefix, name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+    gauges = dict(reg.gauges)
+    for name, hits in reg.counters.items():
+        if name.endswith(".hits"):
+            base = name[:-len(".hits")]
+            lookups = hits + reg.counters.get(f"{base}.misses", 0)
+            gauges[f"{base}.hit_ratio"] = hits / lookups if lookups else 0.0
+    for name, value in sorted(gauges.items()):
+        metric = _metric_name(prefix, name)
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+
+    for name, stats in sorted(reg.timings.items()):
+        metric = _metric_name(prefix, name) + "_seconds"
+        lines += [
+            f"# TYPE {metric} summary",
+            *(f'{metric}{{quantile="{q}"}} {v}'
+              for q, v in zip((0.5, 0.95, 0.99), stats.percentiles(0.5, 0.95, 0.99))),
+            f"{metric}_count {stats.count}",
+            f"{metric}_sum {stats.total}",
+            f"# TYPE {metric}_max gauge",
+            f"{metric}_max {stats.max}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """Record how late the event loop wakes us up (``loop.lag``) forever."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - start - interval)
+        registry.observe("loop.lag", lag)
+        registry.set_gauge("loop.lag_last", lag)
@@ -0,0 +1,149 @@
+"""Rate-limit-aware outbound message scheduler.
+
+All cog ``channel.send`` calls go through ``bot.outbound.send``. Each
+channel gets its own priority queue drained by one task, so sends to a
+channel never compete with each other for its rate-limit bucket and
+important messages go first:
+
+    MODERATION < LOG < WELCOME < LEVELUP   (lower is sent first)
+
+Consecutive plain-text messages for a channel are merged into one send
+(up to Discord's 2000 characters). When a channel's queue grows past
+``max_depth`` the oldest item of the lowest priority is dropped, and
+level-ups that have waited longer than ``stale_after`` seconds are
+dropped instead of sent. Moderation messages are never dropped.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+
+from utils.metrics import registry
+
+MODERATION = 0
+LOG = 1
+WELCOME = 2
+LEVELUP = 3
+
+PRIORITY_NAMES = {MODERATION: "moderation", LOG: "log", WELCOME: "welcome", LEVELUP: "levelup"}
+MESSAGE_LIMIT = 2000
+
+
+def _consume(fut: asyncio.Future) -> None:
+    if not fut.cancelled():
+        fut.exception()
+
+
+class _Item:
+    __slots__ = ("priority", "seq", "queued_at", "content", "kwargs", "future")
+
+    def __init__(self, priority, seq, content, kwargs, future):
+        self.priority = priority
+        self.seq = seq
+        self.queued_at = time.perf_counter()
+        self.content = content
+        self.kwargs = kwargs
+        self.future = future
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    @property
+    def mergeable(self):
+        return not self.kwargs and isinstance(self.content, str)
+
+
+class OutboundScheduler:
+    def __init__(self, max_depth: int = 50, stale_after: float = 30.0):
+        self.max_depth = max_depth
+        self.stale_after = stale_after
+        self._seq = itertools.count()
+        self._queues: dict[int, list[_Item]] = {}
+        self._channels: dict[int, object] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self.depth = 0
+
+    def send(self, channel, content=None, *, priority: int = LOG, **kwargs) -> asyncio.Future:
+        """Queue a message; the future resolves to the sent Message (or None if dropped)."""
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(_consume)
+        item = _Item(priority, next(self._seq), content, kwargs, fut)
+
+        queue = self._queues.setdefault(channel.id, [])
+        self._channels[channel.id] = channel
+        heapq.heappush(queue, item)
+        self.depth += 1
+        if len(queue) > self.max_depth:
+            self._shed(queue)
+        self._report()
+
+        if channel.id not in self._workers:
+            self._workers[channel.id] = asyncio.create_task(self._drain(channel.id))
+        return fut
+
+    def _report(self) -> None:
+        registry.set_gauge("outbound.depth", self.depth)
+        registry.set_gauge("outbound.channels", len(self._queues))
+
+    def _drop(self, item: _Item, reason: str) -> None:
+        self.depth -= 1
+        registry.inc(f"outbound.dropped.{reason}")
+        if not item.future.done():
+            item.future.set_result(None)
+
+    def _shed(self, queue: list[_Item]) -> None:
+        worst = max(queue, key=lambda i: (i.priority, -i.seq))
+        if worst.priority == MODERATION:
+            return
+        queue.remove(worst)
+        heapq.heapify(queue)
+        self._drop(worst, "overflow")
+
+    async def _drain(self, channel_id: int):
+        queue = self._queues[channel_id]
+        channel = self._channels[channel_id]
+        try:
+            while queue:
+                item = heapq.heappop(queue)
+                if item.priority >= LEVELUP and time.perf_counter() - item.queued_at > self.stale_after:
+                    self._drop(item, "stale")
+                    continue
+
+                batch = [item]
+                if item.mergeable:
+                    length = len(item.content)
+                    while queue and queue[0].mergeable and length + 1 + len(queue[0].content) <= MESSAGE_LIMIT:
+                        nxt = heapq.heappop(queue)
+                        batch.append(nxt)
+                        length += 1 + len(nxt.content)
+                    content = "\n".join(i.content for i in batch)
+                else:
+                    content = item.content
+
+                self.depth -= len(batch)
+                if len(batch) > 1:
+                    registry.inc("outbound.merged", len(batch) - 1)
+                try:
+                    message = await channel.send(content, **item.kwargs)
+                except Exception as e:
+                    registry.inc("outbound.errors")
+                    print(f"⚠️ Send to #{channel} failed: {e}")
+                    for i in batch:
+                        if not i.future.done():
+                            i.future.set_exception(e)
+                else:
+                    registry.inc("outbound.sent")
+                    now = time.perf_counter()
+                    for i in batch:
+                        registry.observe(f"outbound.latency.{PRIORITY_NAMES.get(i.priority, i.priority)}", now - i.queued_at)
+                        if not i.future.done():
+                            i.future.set_result(message)
+                self._report()
+        finally:
+            del self._workers[channel_id]
+            # only non-empty if we were cancelled; don't leave futures hanging
+            while queue:
+                self._drop(heapq.heappop(queue), "shutdown")
+            self._queues.pop(channel_id, None)
+            self._channels.pop(channel_id, None)
+            self._report()
@@ -0,0 +1,110 @@
+"""Command timing hooks and an on-demand sampling profiler.
+
+``install(bot)`` times every prefix command (``before_invoke`` /
+``after_invoke``) and every slash command (start stamped in
+``interaction_check``, recorded on ``app_command_completion``) as
+``command.<name>`` in the metrics registry. Listeners and jobs use
+``utils.metrics.instrument`` instead.
+
+``SamplingProfiler`` is a background thread that looks at the event loop
+thread's stack every few milliseconds and counts which functions are on
+it. It costs nothing while stopped and is meant to be switched on for a
+minute from ``/perf`` when something is slow.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+
+from utils.metrics import registry
+
+
+def install(bot) -> None:
+    async def before_invoke(ctx):
+        ctx.perf_start = time.perf_counter()
+
+    async def after_invoke(ctx):
+        start = getattr(ctx, "perf_start", None)
+        if start is not None:
+            registry.event(f"command.{ctx.command.qualified_name}", time.perf_counter() - start)
+
+    async def interaction_check(interaction):
+        interaction.extras["perf_start"] = time.perf_counter()
+        return True
+
+    async def on_app_command_completion(interaction, command):
+        start = interaction.extras.get("perf_start")
+        if start is not None:
+            registry.event(f"command.{command.qualified_name}", time.perf_counter() - start)
+
+    bot.before_invoke(before_invoke)
+    bot.after_invoke(after_invoke)
+    bot.tree.interaction_check = interaction_check
+    bot.add_listener(on_app_command_completion)
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, depth: int = 20):
+        self.interval = interval
+        self.depth = depth
+        self.samples = 0
+        self.started = 0.0
+        self.own = Counter()     # function at the top of the stack
+        self.total = Counter()   # function anywhere on the stack
+        self._target = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, target_thread_id: int | None = None) -> None:
+        """Sample ``target_thread_id`` (default: the calling thread)."""
+        if self.running:
+            return
+        self._target = target_thread_id or threading.get_ident()
+        self.samples = 0
+        self.own.clear()
+        self.total.clear()
+        self.started = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            self.samples += 1
+            seen = set()
+            for i in range(self.depth):
+                code = frame.f_code
+                key = f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+                if i == 0:
+                    self.own[key] += 1
+                if key not in seen:
+                    seen.add(key)
+                    self.total[key] += 1
+                frame = frame.f_back
+                if frame is None:
+                    break
+
+    def report(self, limit: int = 10) -> str:
+        if not self.samples:
+            return "No samples yet."
+        lines = [f"{self.samples} samples over {time.monotonic() - self.started:.0f}s", "self%  total%  function"]
+        for key, own in self.own.most_common(limit):
+            lines.append(f"{100 * own / self.samples:5.1f}  {100 * self.total[key] / self.samples:6.1f}  {key}")
+        return "\n".join(lines)
+
+
+profiler = SamplingProfiler()
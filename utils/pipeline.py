@@ -0,0 +1,50 @@
+"""Single ordered pipeline for incoming messages.
+
+``main.py`` routes ``on_message`` here instead of letting every cog listen
+for it. Cogs register stages with an order number; a stage returns
+``STOP`` to end processing of that message (for example after moderation
+deletes it), so later stages such as XP and command dispatch never see it.
+"""
+import time
+import traceback
+
+from utils.metrics import registry
+
+STOP = "stop"
+
+# Well-known stage orders; cogs may slot in between.
+FILTER = 0
+MODERATION = 10
+# after the word filter, so flooded abuse is still deleted and warned
+FLOOD = 20
+XP = 30
+COMMANDS = 100
+
+
+class MessagePipeline:
+    def __init__(self):
+        self.stages: list[tuple[int, str, object]] = []
+
+    def add_stage(self, name: str, func, order: int) -> None:
+        """Register ``async func(message)`` to run at position ``order``."""
+        self.remove_stage(name)
+        self.stages.append((order, name, func))
+        self.stages.sort(key=lambda stage: stage[0])
+
+    def remove_stage(self, name: str) -> None:
+        self.stages = [stage for stage in self.stages if stage[1] != name]
+
+    async def process(self, message) -> None:
+        registry.inc("pipeline.messages")
+        for _, name, func in self.stages:
+            start = time.perf_counter()
+            try:
+                result = await func(message)
+            except Exception:
+                registry.inc(f"pipeline.errors.{name}")
+                traceback.print_exc()
+                result = None
+            registry.event(f"pipeline.stage.{name}", time.perf_counter() - start)
+            if result is STOP:
+                registry.inc(f"pipeline.stopped.{name}")
+                return
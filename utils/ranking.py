@@ -0,0 +1,200 @@
+"""Incremental XP rank index.
+
+Keeps a guild's users ordered by ``(-xp, user_id)`` so ranks and
+leaderboard pages no longer need a full sort. Keys live in a list of
+sorted buckets (bisect inside a bucket is a C-level memmove); a Fenwick
+tree over the bucket sizes turns "position -> bucket" and "bucket ->
+position" into O(log n) walks.
+
+The index doesn't keep its own copy of anyone's XP: it reads the guild's
+``MemberTable``, and each user is a single packed int key,
+``-xp << 64 | user_id``, which sorts the same way as the tuple would.
+Callers re-key a user with ``moved`` after changing their XP in the
+table.
+"""
+from bisect import bisect_left, insort
+
+ID_BITS = 64
+ID_MASK = (1 << ID_BITS) - 1
+
+
+def pack(user_id: int, xp: int) -> int:
+    return -xp << ID_BITS | user_id
+
+
+def unpack(key: int) -> tuple[int, int]:
+    """``(user_id, xp)`` for a packed key."""
+    return key & ID_MASK, -(key >> ID_BITS)
+
+
+class RankIndex:
+    LOAD = 512  # target bucket size; buckets split at 2 * LOAD
+
+    def __init__(self, table):
+        self.table = table
+        self._len = 0
+        self._lists: list[list[int]] = []
+        self._maxes: list[int] = []
+        self._tree: list[int] = []
+        if len(table):
+            self._bulk_load(table.xp_items())
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, user_id):
+        return self._find(self._key(user_id)) is not None
+
+    # --- Fenwick tree over bucket sizes ---
+    def _build_tree(self):
+        tree = [len(b) for b in self._lists]
+        for i in range(len(tree)):
+            j = i | (i + 1)
+            if j < len(tree):
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, i, delta):
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i |= i + 1
+
+    def _prefix(self, i):
+        """Number of keys stored in buckets ``[0, i)``."""
+        total = 0
+        tree = self._tree
+        while i > 0:
+            total += tree[i - 1]
+            i &= i - 1
+        return total
+
+    def _locate(self, pos):
+        """Map a 0-based position to ``(bucket, index in bucket)``."""
+        tree = self._tree
+        idx = 0
+        bit = 1 << (len(tree).bit_length() - 1) if tree else 0
+        while bit:
+            nxt = idx + bit
+            if nxt <= len(tree) and tree[nxt - 1] <= pos:
+                pos -= tree[nxt - 1]
+                idx = nxt
+            bit >>= 1
+        return idx, pos
+
+    # --- key maintenance ---
+    def _key(self, user_id):
+        return pack(user_id, self.table.get_xp(user_id))
+
+    def _find(self, key):
+        """``(bucket, index in bucket)`` of ``key``, or None."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return None
+        bucket = self._lists[i]
+        j = bisect_left(bucket, key)
+        return (i, j) if bucket[j] == key else None
+
+    def _bulk_load(self, items):
+        keys = sorted(pack(uid, xp) for uid, xp in items)
+        self._len = len(keys)
+        self._lists = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._maxes = [b[-1] for b in self._lists]
+        self._build_tree()
+
+    def _insert(self, key):
+        self._len += 1
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._build_tree()
+            return
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._lists[i].append(key)
+            self._maxes[i] = key
+        else:
+            insort(self._lists[i], key)
+        self._tree_add(i, 1)
+
+        bucket = self._lists[i]
+        if len(bucket) > 2 * self.LOAD:
+            half = bucket[self.LOAD:]
+            del bucket[self.LOAD:]
+            self._maxes[i] = bucket[-1]
+            self._lists.insert(i + 1, half)
+            self._maxes.insert(i + 1, half[-1])
+            self._build_tree()
+
+    def _delete(self, key):
+        """Remove ``key`` if it's indexed; returns whether it was."""
+        found = self._find(key)
+        if found is None:
+            return False
+        i, j = found
+        bucket = self._lists[i]
+        del bucket[j]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._build_tree()
+        return True
+
+    # --- public API ---
+    def add(self, user_id: int) -> None:
+        """Index ``user_id`` at their current table XP (no-op if already in)."""
+        key = self._key(user_id)
+        if self._find(key) is None:
+            self._insert(key)
+
+    def moved(self, user_id: int, old_xp: int) -> None:
+        """Re-key ``user_id`` after their table XP changed from ``old_xp``.
+        Users that weren't indexed (e.g. they had left) are added."""
+        new = self._key(user_id)
+        old = pack(user_id, old_xp)
+        if old != new:
+            self._delete(old)
+            self._insert(new)
+        elif self._find(new) is None:
+            self._insert(new)
+
+    def remove(self, user_id: int) -> None:
+        """Drop ``user_id`` from the ordering; their table row is untouched."""
+        self._delete(self._key(user_id))
+
+    def rank(self, user_id: int) -> int | None:
+        """1-based rank of ``user_id`` (highest XP first), or None."""
+        found = self._find(self._key(user_id))
+        if found is None:
+            return None
+        i, j = found
+        return self._prefix(i) + j + 1
+
+    def page(self, offset: int = 0, limit: int = 10) -> list[tuple[int, int]]:
+        """``limit`` ``(user_id, xp)`` pairs starting at 0-based ``offset``."""
+        if offset >= self._len or limit <= 0:
+            return []
+        i, j = self._locate(offset)
+        out = []
+        while i < len(self._lists) and len(out) < limit:
+            out.extend(map(unpack, self._lists[i][j:j + limit - len(out)]))
+            i += 1
+            j = 0
+        return out
+
+    def iter_from(self, offset: int = 0):
+        """Yield ``(user_id, xp)`` in rank order starting at ``offset``."""
+        if offset >= self._len:
+            return
+        i, j = self._locate(offset)
+        while i < len(self._lists):
+            for key in self._lists[i][j:]:
+                yield unpack(key)
+            i += 1
+            j = 0
@@ -0,0 +1,58 @@
+"""Bounded executor for CPU-heavy work (welcome banner rendering).
+
+``RenderPool.run(fn, *args)`` runs ``fn`` in a thread or process pool and
+only awaits the result, keeping Pillow off the event loop. At most
+``workers + max_queue`` jobs are accepted at once; beyond that ``run``
+raises ``QueueFull`` so callers can fall back instead of piling up.
+"""
+import asyncio
+import concurrent.futures
+import time
+
+from utils.metrics import registry
+
+
+class QueueFull(Exception):
+    pass
+
+
+class RenderPool:
+    def __init__(self, name: str, kind: str = "thread", workers: int = 2, max_queue: int = 32):
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self.in_flight = 0
+        self._executor = None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=self.name
+            )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.capacity:
+            registry.inc(f"render.{self.name}.rejected")
+            raise QueueFull(f"{self.name} render queue is full")
+
+        self.start()
+        self.in_flight += 1
+        registry.set_gauge(f"render.{self.name}.queue_depth", self.in_flight)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            registry.observe(f"render.{self.name}.latency", time.perf_counter() - start)
+            self.in_flight -= 1
+            registry.set_gauge(f"render.{self.name}.queue_depth", self.in_flight)
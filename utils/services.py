@@ -0,0 +1,44 @@
+"""Wiring every bot process shares.
+
+``install`` sets up the message pipeline's own stages and the services the
+cogs expect on the bot (``bot.pipeline``, ``bot.guild_config``, ...).
+main.py and the offline harness (benchmarks/harness.py) both call it
+before loading ``COGS``, so the cogs run against the same setup in both.
+"""
+from utils import perf, pipeline
+from utils.channels import ChannelResolver
+from utils.config import GuildConfig
+from utils.flood import FloodDetector
+from utils.outbound import OutboundScheduler
+from utils.sharding import ShardConfig
+
+COGS = ["cogs.utility", "cogs.levels", "cogs.moderation", "cogs.welcome"]
+
+
+def install(bot, sharding: ShardConfig, flood: FloodDetector | None = None) -> None:
+    bot.sharding = sharding
+
+    # ===== Message pipeline =====
+    # Every message goes through one ordered pipeline: filter -> moderation ->
+    # flood -> XP -> commands. Cogs add their own stages in cog_load.
+    bot.pipeline = pipeline.MessagePipeline()
+
+    async def ignore_bots(message):
+        if message.author.bot:
+            return pipeline.STOP
+
+    async def dispatch_commands(message):
+        await bot.process_commands(message)
+
+    bot.pipeline.add_stage("filter", ignore_bots, pipeline.FILTER)
+    bot.pipeline.add_stage("commands", dispatch_commands, pipeline.COMMANDS)
+
+    # ===== Shared services =====
+    bot.guild_config = GuildConfig()
+    bot.channel_resolver = ChannelResolver(bot, bot.guild_config)
+    # all cog channel.send calls are queued here (moderation > logs > welcome > level-ups)
+    bot.outbound = OutboundScheduler()
+    # flood/raid detection; Moderation acts on it, Levels and Welcome back off
+    bot.flood = flood or FloodDetector.from_env()
+    # times every prefix and slash command as command.<name> (see /perf)
+    perf.install(bot)
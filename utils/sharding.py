@@ -0,0 +1,94 @@
+"""Shard layout for running the bot as one or more worker processes.
+
+Discord sends each guild's events to shard ``(guild_id >> 22) % shard_count``.
+A worker runs an ``AutoShardedBot`` over a subset of the shards, so every
+guild -- and every XP, warning and config row keyed by it -- is handled by
+exactly one process at a time. State that spans guilds (the global
+leaderboard) is read from the shared SQLite store instead of memory.
+
+    SHARD_COUNT   unset: one plain ``commands.Bot``, no sharding
+                  ``auto``: one process running Discord's recommended count
+                  N: N shards in total
+    SHARD_IDS     comma-separated shards this process runs (default: all)
+
+``python main.py --workers K`` works out the count and starts K workers
+with both variables set.
+"""
+import os
+
+import aiohttp
+
+API_BASE = "https://discord.com/api/v10"
+
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+def split(shard_count: int, workers: int) -> list[list[int]]:
+    """Contiguous runs of shard ids, one per worker (fewer if there are
+    more workers than shards)."""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    runs, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        runs.append(list(range(start, end)))
+        start = end
+    return runs
+
+
+async def recommended_shards(token: str) -> int:
+    """Shard count Discord recommends for this bot (``GET /gateway/bot``)."""
+    headers = {"Authorization": f"Bot {token}"}
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async with session.get(f"{API_BASE}/gateway/bot") as resp:
+            resp.raise_for_status()
+            return int((await resp.json())["shards"])
+
+
+class ShardConfig:
+    def __init__(self, shard_count: int | None = None, shard_ids: list[int] | None = None,
+                 enabled: bool = False):
+        self.enabled = enabled or shard_count is not None
+        # None with enabled=True: let discord.py ask Discord for the count
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+
+    @classmethod
+    def from_env(cls) -> "ShardConfig":
+        count = os.getenv("SHARD_COUNT", "").strip().lower()
+        if not count:
+            return cls()
+        ids = os.getenv("SHARD_IDS", "").strip()
+        shard_ids = [int(i) for i in ids.split(",") if i.strip()] if ids else None
+        if count == "auto":
+            return cls(enabled=True)
+        return cls(int(count), shard_ids)
+
+    @property
+    def multi_process(self) -> bool:
+        """Other processes run the remaining shards."""
+        return self.shard_ids is not None and len(self.shard_ids) < (self.shard_count or 0)
+
+    @property
+    def primary(self) -> bool:
+        """Does once-per-deployment work (command sync, JSON imports)."""
+        return self.shard_ids is None or 0 in self.shard_ids
+
+    def owns(self, guild_id: int) -> bool:
+        if self.shard_ids is None:
+            return True
+        return shard_for(guild_id, self.shard_count) in self.shard_ids
+
+    def bot_kwargs(self) -> dict:
+        """Keyword arguments for ``commands.AutoShardedBot``."""
+        return {"shard_count": self.shard_count, "shard_ids": self.shard_ids}
+
+    def describe(self) -> str:
+        if not self.enabled:
+            return "unsharded"
+        if self.shard_count is None:
+            return "auto-sharded"
+        ids = self.shard_ids if self.shard_ids is not None else range(self.shard_count)
+        return f"shards {','.join(map(str, ids))} of {self.shard_count}"
@@ -0,0 +1,82 @@
+"""Per-phase timing of a cold start.
+
+main.py and the cogs mark phases -- imports, cog load, state load, login,
+command sync, ready -- on the shared ``timer``; the breakdown is printed
+once, on the first ``on_ready``. Phases can overlap (Levels reads its
+store in the background while the bot logs in), so each line shows when
+the phase started as well as how long it ran. ``a/b`` is a sub-phase of
+``a``; a parent that isn't timed itself is reported as running from its
+first child's start to its last child's end. Finished phases are also
+exported as ``startup.<phase>`` gauges (seconds) on /metrics.
+"""
+import time
+from contextlib import contextmanager
+
+from utils.metrics import registry
+
+
+class StartupTimer:
+    def __init__(self, origin: float | None = None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        # name -> [start, end or None]
+        self.phases: dict[str, list] = {}
+        self.reported = False
+
+    def begin(self, name: str, at: float | None = None) -> None:
+        self.phases.setdefault(name, [at if at is not None else time.perf_counter(), None])
+
+    def end(self, name: str) -> None:
+        span = self.phases.get(name)
+        if span is None or span[1] is not None:
+            return
+        span[1] = time.perf_counter()
+        self._export(name, span)
+
+    @staticmethod
+    def _export(name, span):
+        key = name.replace(" ", "_").replace("/", ".")
+        registry.set_gauge(f"startup.{key}", span[1] - span[0])
+
+    @contextmanager
+    def phase(self, name: str):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def _spans(self) -> dict[str, list]:
+        spans = dict(self.phases)
+        for name in self.phases:
+            parent = name.rpartition("/")[0]
+            if not parent or parent in self.phases:
+                continue
+            children = [s for n, s in self.phases.items() if n.startswith(parent + "/")]
+            done = all(s[1] is not None for s in children)
+            spans[parent] = [min(s[0] for s in children), max(s[1] for s in children) if done else None]
+            if done:
+                self._export(parent, spans[parent])
+        return spans
+
+    def report(self) -> str:
+        now = time.perf_counter()
+        lines = [f"⏱️ Startup: {now - self.origin:.2f}s to ready"]
+        spans = self._spans()
+
+        def order(item):
+            # top-level phases by start time, each followed by its sub-phases
+            name, (start, _) = item
+            root = name.split("/")[0]
+            return spans[root][0], root, name != root, start
+
+        for name, (start, end) in sorted(spans.items(), key=order):
+            depth = name.count("/")
+            label = "  " * depth + name.rpartition("/")[2]
+            took = f"{(end - start) * 1000:.0f} ms" if end is not None else "running"
+            lines.append(f"  {label:<28} {took:>10}   at +{(start - self.origin) * 1000:.0f} ms")
+        self.reported = True
+        return "\n".join(lines)
+
+
+# started when main.py imports it, before anything heavy
+timer = StartupTimer()
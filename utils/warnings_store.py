@@ -0,0 +1,169 @@
+"""Per-guild warning records in SQLite.
+
+Each warning is one row (guild, user, moderator, reason, timestamp) with an
+index on ``(guild_id, user_id, created_at)``, so adding a warning is a
+single insert and counting or listing a member's active warnings is an
+index range scan. Warnings older than ``expire_after`` seconds no longer
+count and are pruned periodically.
+
+The old ``warnings.json`` (counts per user, no guild) is imported once
+into ``LEGACY_GUILD``; a user's legacy warnings move to the first guild
+they are warned or looked up in.
+
+Several shard workers may share the database: each write is one
+``BEGIN IMMEDIATE`` transaction, so a warning and the count returned for
+it can't interleave with another process's.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.xp_store import BUSY_TIMEOUT_MS, LEGACY_GUILD
+
+LEGACY_FILE = "warnings.json"
+
+
+class WarningStore:
+    def __init__(self, path: str = "warnings.db", expire_after: float = 30 * 86400):
+        self.path = path
+        # 0 keeps warnings forever
+        self.expire_after = expire_after
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                    timeout=BUSY_TIMEOUT_MS / 1000)
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS warnings ("
+            " id INTEGER PRIMARY KEY,"
+            " guild_id INTEGER NOT NULL,"
+            " user_id INTEGER NOT NULL,"
+            " moderator_id INTEGER,"
+            " reason TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS warnings_member ON warnings (guild_id, user_id, created_at)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS warnings_age ON warnings (created_at)")
+        self._migrate_json()
+        self._legacy = {
+            uid for (uid,) in self.conn.execute(
+                "SELECT DISTINCT user_id FROM warnings WHERE guild_id = ?", (LEGACY_GUILD,)
+            )
+        }
+
+    def _migrate_json(self, path: str = LEGACY_FILE):
+        if not os.path.exists(path):
+            return
+        # the write lock makes a second worker starting alongside wait, then
+        # find the file already renamed
+        self.conn.execute("BEGIN IMMEDIATE")
+        if not os.path.exists(path):
+            self.conn.execute("ROLLBACK")
+            return
+        with open(path, "r") as f:
+            counts = {int(k): int(v) for k, v in json.load(f).items()}
+        now = time.time()
+        rows = [
+            (LEGACY_GUILD, uid, None, "Imported from warnings.json", now)
+            for uid, count in counts.items() for _ in range(count)
+        ]
+        try:
+            self.conn.executemany(
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            os.replace(path, f"{path}.migrated")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        print(f"📦 Migrated {path} into {self.path} ({len(rows)} warnings)")
+
+    def _cutoff(self, now: float) -> float:
+        return now - self.expire_after if self.expire_after else 0.0
+
+    def _claim_legacy(self, guild_id: int, user_id: int) -> None:
+        # caller holds the lock
+        if user_id not in self._legacy:
+            return
+        self._legacy.discard(user_id)
+        self.conn.execute(
+            "UPDATE warnings SET guild_id = ? WHERE guild_id = ? AND user_id = ?",
+            (guild_id, LEGACY_GUILD, user_id),
+        )
+
+    def add(self, guild_id: int, user_id: int, moderator_id: int | None, reason: str) -> int:
+        """Record a warning; returns the member's active warning count."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._claim_legacy(guild_id, user_id)
+                self.conn.execute(
+                    "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (guild_id, user_id, moderator_id, reason, now),
+                )
+                count = self._count(guild_id, user_id, now)
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return count
+
+    def _count(self, guild_id: int, user_id: int, now: float) -> int:
+        (count,) = self.conn.execute(
+            "SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ? AND created_at >= ?",
+            (guild_id, user_id, self._cutoff(now)),
+        ).fetchone()
+        return count
+
+    def count(self, guild_id: int, user_id: int) -> int:
+        with self._lock:
+            self._claim_legacy(guild_id, user_id)
+            return self._count(guild_id, user_id, time.time())
+
+    def recent(self, guild_id: int, user_id: int, limit: int = 5) -> list[tuple[int | None, str, float]]:
+        """Newest active warnings as ``(moderator_id, reason, created_at)``."""
+        with self._lock:
+            self._claim_legacy(guild_id, user_id)
+            return self.conn.execute(
+                "SELECT moderator_id, reason, created_at FROM warnings "
+                "WHERE guild_id = ? AND user_id = ? AND created_at >= ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (guild_id, user_id, self._cutoff(time.time()), limit),
+            ).fetchall()
+
+    def clear(self, guild_id: int, user_id: int) -> int:
+        """Delete all of a member's warnings; returns how many were active."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._claim_legacy(guild_id, user_id)
+                active = self._count(guild_id, user_id, time.time())
+                self.conn.execute(
+                    "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+                )
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return active
+
+    def prune(self) -> int:
+        """Delete expired warnings; returns how many were removed."""
+        if not self.expire_after:
+            return 0
+        with self._lock:
+            cur = self.conn.execute(
+                "DELETE FROM warnings WHERE created_at < ?", (self._cutoff(time.time()),)
+            )
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
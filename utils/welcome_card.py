@@ -0,0 +1,329 @@
+"""Welcome banner rendering.
+
+Pure Pillow code with no discord objects, so it can run in a thread or
+process pool (see ``utils.render_pool``). ``render_card`` takes plain
+values and returns the encoded image bytes.
+
+Everything that does not depend on the member (decoded banner, fonts,
+avatar ring and mask) is built once per process by ``load_template`` and
+rebuilt only when the banner or font file's mtime changes.
+"""
+import io
+import os
+import threading
+from dataclasses import dataclass
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+ASSET_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BANNER_PATH = os.path.join(ASSET_DIR, "BANNER2.jpg")
+FONT_PATH = os.path.join(ASSET_DIR, "Asgrike.otf")
+
+# 256x256 ramp, 0 on the left to 255 on the right
+_RAMP = Image.linear_gradient("L").transpose(Image.Transpose.ROTATE_90)
+
+
+def measure_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont):
+    try:
+        bbox = draw.textbbox((0, 0), text, font=font)
+        return (bbox[2] - bbox[0], bbox[3] - bbox[1])
+    except Exception:
+        try:
+            return draw.textsize(text, font=font)
+        except Exception:
+            return (len(text) * 10, 20)
+
+
+def draw_gradient_text(base_img: Image.Image, pos: tuple[int, int], text: str, font: ImageFont.ImageFont, left_color: tuple, right_color: tuple, shadow: int = 2):
+    draw_base = ImageDraw.Draw(base_img)
+    w, h = measure_text(draw_base, text, font)
+    if w <= 0 or h <= 0:
+        return
+
+    x, y = pos
+
+    if shadow:
+        draw_base.text((x + shadow, y + shadow), text, font=font, fill="black")
+
+    mask = Image.new("L", (w, h), 0)
+    draw_mask = ImageDraw.Draw(mask)
+    draw_mask.text((0, 0), text, font=font, fill=255)
+
+    # horizontal 0..255 ramp stretched to the text box, then mapped to the colours
+    ramp = _RAMP.resize((w, h), Image.BILINEAR)
+    grad = ImageOps.colorize(ramp, left_color[:3], right_color[:3])
+
+    base_img.paste(grad, (x, y), mask)
+
+
+class Template:
+    """Member-independent parts of the card for one banner/font pair."""
+
+    def __init__(self, banner_path: str, font_path: str):
+        self.background = Image.open(banner_path).convert("RGBA")
+        W, H = self.background.size
+
+        self.avatar_size = int(H * 0.6)
+        self.mask = Image.new("L", (self.avatar_size, self.avatar_size), 0)
+        ImageDraw.Draw(self.mask).ellipse((0, 0, self.avatar_size, self.avatar_size), fill=255)
+
+        self.border = max(4, int(H * 0.02))
+        ring_size = self.avatar_size + 2 * self.border
+        self.ring = Image.new("RGBA", (ring_size, ring_size), (0, 0, 0, 0))
+        ImageDraw.Draw(self.ring).ellipse((0, 0, ring_size - 1, ring_size - 1), fill=(255, 255, 255, 255))
+
+        # shown when the avatar fetch misses its latency budget
+        self.placeholder = Image.new("RGBA", (self.avatar_size, self.avatar_size), (88, 101, 242, 255))
+
+        self.avatar_x = int(W * 0.04)
+        self.avatar_y = (H - ring_size) // 2
+
+        try:
+            self.font_big = ImageFont.truetype(font_path, int(H * 0.14))
+            self.font_small = ImageFont.truetype(font_path, int(H * 0.07))
+        except Exception:
+            self.font_big = ImageFont.load_default()
+            self.font_small = ImageFont.load_default()
+
+
+def _mtime(path: str) -> float | None:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def load_template(banner_path: str = BANNER_PATH, font_path: str = FONT_PATH) -> Template:
+    """Return the cached template, rebuilding it if an asset changed on disk."""
+    key = (banner_path, font_path)
+    stamp = (_mtime(banner_path), _mtime(font_path))
+    cached = _templates.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with _template_lock:
+        cached = _templates.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        template = Template(banner_path, font_path)
+        _templates[key] = (stamp, template)
+        return template
+
+
+_templates: dict[tuple[str, str], tuple[tuple, Template]] = {}
+_template_lock = threading.Lock()
+
+
+def warm(banner_path: str = BANNER_PATH, font_path: str = FONT_PATH) -> None:
+    """Build the template ahead of the first card (returns nothing, so it
+    can run in a process pool)."""
+    load_template(banner_path, font_path)
+
+
+def fit_avatar(avatar_bytes: bytes, banner_path: str = BANNER_PATH, font_path: str = FONT_PATH) -> Image.Image:
+    """Decode an avatar and fit it to the template's avatar size."""
+    size = load_template(banner_path, font_path).avatar_size
+    avatar = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
+    return ImageOps.fit(avatar, (size, size), Image.LANCZOS)
+
+
+def compose_card(avatar: Image.Image | None, display_name: str, guild_name: str, member_count: int,
+                 banner_path: str = BANNER_PATH, font_path: str = FONT_PATH) -> Image.Image:
+    """Draw the welcome banner for one member (not yet encoded).
+
+    ``avatar`` comes from ``fit_avatar``; None draws the placeholder.
+    """
+    template = load_template(banner_path, font_path)
+    background = template.background.copy()
+    W, H = background.size
+
+    if avatar is None or avatar.size != (template.avatar_size, template.avatar_size):
+        avatar = template.placeholder
+
+    bordered = template.ring.copy()
+    bordered.paste(avatar, (template.border, template.border), template.mask)
+
+    avatar_x, avatar_y = template.avatar_x, template.avatar_y
+    background.paste(bordered, (avatar_x, avatar_y), bordered)
+
+    font_big, font_small = template.font_big, template.font_small
+
+    draw = ImageDraw.Draw(background)
+
+    main_text = f"HEY @{display_name.upper()}!"
+    subtext = f"WELCOME TO {guild_name.upper()} | YOU ARE OUR {member_count}TH MEMBER!"
+
+    text_x = avatar_x + bordered.size[0] + int(W * 0.05)
+    main_w, main_h = measure_text(draw, main_text, font_big)
+    avatar_center_y = avatar_y + bordered.size[1] // 2
+    text_y = avatar_center_y - main_h // 2 - int(H * 0.04)
+    subtext_y = text_y + main_h + int(H * 0.03)
+
+    draw_gradient_text(
+        background, (text_x, text_y), main_text, font_big,
+        left_color=(0, 220, 220), right_color=(255, 255, 255), shadow=3
+    )
+    draw_gradient_text(
+        background, (text_x, subtext_y), subtext, font_small,
+        left_color=(0, 220, 220), right_color=(255, 255, 255), shadow=2
+    )
+
+    return background
+
+
+# a collage draws at most this many avatars, none smaller than MIN_RING px;
+# the rest are summed up in a "+K" circle
+MAX_COLLAGE_AVATARS = 12
+MIN_RING = 48
+
+
+def compose_collage(avatars: list[Image.Image | None], guild_name: str, member_count: int,
+                    banner_path: str = BANNER_PATH, font_path: str = FONT_PATH) -> Image.Image:
+    """Draw one banner welcoming several members, their avatars in a strip."""
+    template = load_template(banner_path, font_path)
+    background = template.background.copy()
+    W, H = background.size
+
+    # shrink the circles so the whole strip fits beside the text, down to
+    # MIN_RING; beyond that (or MAX_COLLAGE_AVATARS) the last slot is "+K"
+    gap = max(2, int(H * 0.02))
+    strip_w = int(W * 0.5)
+    fits = max(1, (strip_w + gap) // (MIN_RING + gap))
+    slots = min(max(len(avatars), 1), MAX_COLLAGE_AVATARS, fits)
+    shown = avatars if len(avatars) <= slots else avatars[:slots - 1]
+    extra = len(avatars) - len(shown)
+    ring_size = min(template.ring.size[0], max(MIN_RING, (strip_w - gap * (slots - 1)) // slots))
+    scale = ring_size / template.ring.size[0]
+    border = max(1, int(template.border * scale))
+    inner = ring_size - 2 * border
+    ring = template.ring.resize((ring_size, ring_size), Image.LANCZOS)
+    mask = template.mask.resize((inner, inner), Image.LANCZOS)
+
+    x = int(W * 0.04)
+    y = (H - ring_size) // 2
+    for avatar in shown:
+        if avatar is None:
+            avatar = template.placeholder
+        bordered = ring.copy()
+        bordered.paste(avatar.resize((inner, inner), Image.LANCZOS), (border, border), mask)
+        background.paste(bordered, (x, y), bordered)
+        x += ring_size + gap
+
+    draw = ImageDraw.Draw(background)
+    if extra:
+        bordered = ring.copy()
+        bordered.paste(template.placeholder.resize((inner, inner), Image.LANCZOS), (border, border), mask)
+        background.paste(bordered, (x, y), bordered)
+        label = f"+{extra}"
+        label_w, label_h = measure_text(draw, label, template.font_small)
+        draw.text((x + (ring_size - label_w) // 2, y + (ring_size - label_h) // 2), label,
+                  font=template.font_small, fill="white")
+        x += ring_size + gap
+
+    main_text = f"WELCOME {len(avatars)} NEW MEMBERS!"
+    subtext = f"TO {guild_name.upper()} | WE ARE NOW {member_count} STRONG!"
+
+    text_x = x + int(W * 0.03)
+    main_w, main_h = measure_text(draw, main_text, template.font_small)
+    text_y = H // 2 - main_h - int(H * 0.02)
+    subtext_y = H // 2 + int(H * 0.02)
+
+    draw_gradient_text(
+        background, (text_x, text_y), main_text, template.font_small,
+        left_color=(0, 220, 220), right_color=(255, 255, 255), shadow=2
+    )
+    draw_gradient_text(
+        background, (text_x, subtext_y), subtext, template.font_small,
+        left_color=(0, 220, 220), right_color=(255, 255, 255), shadow=2
+    )
+    return background
+
+
+# ===== Encoding =====
+@dataclass(frozen=True)
+class EncodeOptions:
+    """How a finished card is encoded.
+
+    ``format`` is ``png``, ``png8`` (256-colour quantized PNG), ``webp`` or
+    ``jpeg``; ``optimize`` turns on Pillow's slower, smaller PNG/JPEG
+    encoding. ``width`` downscales first (0 keeps the banner size).
+    ``max_bytes`` is a budget: quality and then size are stepped down
+    until the file fits or the floors are reached (0 means no budget).
+    """
+    format: str = "png"
+    quality: int = 85
+    width: int = 0
+    max_bytes: int = 0
+    optimize: bool = False
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            format=os.getenv("WELCOME_IMAGE_FORMAT", "png").lower(),
+            quality=int(os.getenv("WELCOME_IMAGE_QUALITY", 85)),
+            width=int(os.getenv("WELCOME_IMAGE_WIDTH", 0)),
+            max_bytes=int(os.getenv("WELCOME_IMAGE_MAX_BYTES", 0)),
+            optimize=os.getenv("WELCOME_IMAGE_OPTIMIZE", "").lower() in ("1", "true", "yes"),
+        )
+
+
+EXTENSIONS = {"png": "png", "png8": "png", "webp": "webp", "jpeg": "jpg"}
+MIN_QUALITY = 40
+MIN_WIDTH = 320
+
+
+def _encode_once(img: Image.Image, fmt: str, quality: int, optimize: bool) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "jpeg":
+        img.convert("RGB").save(buf, "JPEG", quality=quality, optimize=optimize)
+    elif fmt == "webp":
+        img.save(buf, "WEBP", quality=quality, method=4)
+    elif fmt == "png8":
+        img.convert("RGB").quantize(256).save(buf, "PNG", optimize=optimize)
+    elif fmt == "png":
+        img.save(buf, "PNG", optimize=optimize)
+    else:
+        raise ValueError(f"Unknown image format: {fmt}")
+    return buf.getvalue()
+
+
+def _scaled(img: Image.Image, width: int) -> Image.Image:
+    if not width or width >= img.width:
+        return img
+    return img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+
+
+def encode_card(img: Image.Image, options: EncodeOptions = EncodeOptions()) -> tuple[bytes, str]:
+    """Encode ``img`` per ``options``; returns ``(data, file extension)``."""
+    fmt = options.format
+    img = _scaled(img, options.width)
+    quality = options.quality
+    data = _encode_once(img, fmt, quality, options.optimize)
+
+    lossy = fmt in ("jpeg", "webp")
+    while options.max_bytes and len(data) > options.max_bytes:
+        if lossy and quality > MIN_QUALITY:
+            quality = max(MIN_QUALITY, quality - 10)
+        elif fmt == "png":
+            fmt = "png8"  # lossless didn't fit; try the palette version
+        elif img.width > MIN_WIDTH:
+            img = _scaled(img, max(MIN_WIDTH, int(img.width * 0.8)))
+        else:
+            break
+        data = _encode_once(img, fmt, quality, options.optimize)
+    return data, EXTENSIONS[fmt]
+
+
+def render_collage(avatars: list[Image.Image | None], guild_name: str, member_count: int,
+                   options: EncodeOptions = EncodeOptions(),
+                   banner_path: str = BANNER_PATH, font_path: str = FONT_PATH) -> tuple[bytes, str]:
+    """Render and encode the multi-member banner."""
+    card = compose_collage(avatars, guild_name, member_count, banner_path, font_path)
+    return encode_card(card, options)
+
+
+def render_card(avatar: Image.Image | None, display_name: str, guild_name: str, member_count: int,
+                options: EncodeOptions = EncodeOptions(),
+                banner_path: str = BANNER_PATH, font_path: str = FONT_PATH) -> tuple[bytes, str]:
+    """Render and encode the welcome banner for one member."""
+    card = compose_card(avatar, display_name, guild_name, member_count, banner_path, font_path)
+    return encode_card(card, options)
@@ -0,0 +1,295 @@
+"""Banned-word filter: text normalization plus an Aho-Corasick automaton.
+
+``normalize`` folds the usual evasions before matching:
+
+* Unicode compatibility forms and accents (NFKD, combining marks dropped)
+* case (``casefold``) and look-alike letters (Cyrillic/Greek confusables,
+  leetspeak digits and symbols)
+* zero-width and other invisible characters
+* separators: punctuation and whitespace split words, and runs of
+  single letters (``f.u.c.k``, ``f u c k``) are glued back together; a
+  run starting with a one-letter word (``what a s h i t``) is also kept
+  without that letter
+* repeated letters (``fuuuck``): text and patterns are matched with
+  repeats collapsed, but a match also needs every letter repeated at
+  least as often as in the word, so letters can be stretched, not
+  shortened (``kutta`` doesn't match the name "Kuta")
+
+The result is a string of alphanumeric tokens separated by single spaces,
+and a pattern only matches a whole token run, like ``\\b...\\b`` did.
+Matching is one pass over the normalized text regardless of list size.
+"""
+import json
+import os
+import re
+import time
+import unicodedata
+from itertools import groupby
+
+INVISIBLE = dict.fromkeys([
+    0x00AD, 0x034F, 0x061C, 0x115F, 0x1160, 0x17B4, 0x17B5, 0x180E,
+    *range(0x200B, 0x2010), *range(0x202A, 0x202F), *range(0x2060, 0x2070),
+    0x3164, 0xFEFF, 0xFFA0,
+], None)
+
+CONFUSABLES = str.maketrans({
+    # leetspeak
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g",
+    # Cyrillic
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j",
+    "ѕ": "s", "ԁ": "d", "ԛ": "q", "ԝ": "w", "һ": "h", "ɡ": "g",
+    # Greek
+    "α": "a", "β": "b", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v", "ο": "o",
+    "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+    # Latin look-alikes that survive NFKD
+    "ı": "i", "ł": "l", "ø": "o", "đ": "d", "ß": "ss", "æ": "ae", "œ": "oe",
+})
+
+# symbols only stand for letters inside a word ("sh!t", "$hit", "a$$"), not
+# as trailing punctuation ("hi!")
+SYMBOL_LEET = {"@": "a", "$": "s", "!": "i", "|": "i", "+": "t", "€": "e", "£": "l"}
+
+
+def _fold(text: str) -> str:
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text.translate(INVISIBLE))
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.casefold().translate(CONFUSABLES)
+
+
+REPEATS = re.compile(r"(.)\1+")
+
+# one-letter words that can precede a spaced-out run ("what a s h i t")
+STANDALONE_LETTERS = {"a", "i"}
+
+
+def _tokens(folded: str) -> list[str]:
+    size = len(folded)
+    tokens = []
+    current = []
+    for i, ch in enumerate(folded):
+        if ch in SYMBOL_LEET:
+            j = i + 1
+            while j < size and folded[j] in SYMBOL_LEET:
+                j += 1
+            if j < size and folded[j].isalnum():
+                ch = SYMBOL_LEET[ch]
+        if ch.isalnum():
+            current.append(ch)
+        elif current:
+            tokens.append("".join(current))
+            current = []
+    if current:
+        tokens.append("".join(current))
+    return tokens
+
+
+def _glue(tokens: list[str]) -> list[str]:
+    """Glue runs of single letters: "f u c k" / "f.u.c.k" -> "fuck"."""
+    out = []
+    run = []
+
+    def flush():
+        out.append("".join(run))
+        if len(run) >= 3 and run[0] in STANDALONE_LETTERS:
+            # the first letter may be a word of its own; keep that reading too
+            out.append(run[0])
+            out.append("".join(run[1:]))
+        run.clear()
+
+    for tok in tokens:
+        if len(tok) == 1:
+            run.append(tok)
+            continue
+        if run:
+            flush()
+        out.append(tok)
+    if run:
+        flush()
+    return out
+
+
+def normalize_runs(text: str) -> tuple[str, list[int]]:
+    """``normalize(text)`` plus, per character, how many times it was
+    repeated before collapsing (0 for the separating spaces)."""
+    chars = []
+    counts = []
+    for tok in _glue(_tokens(_fold(text))):
+        if chars:
+            chars.append(" ")
+            counts.append(0)
+        for ch, group in groupby(tok):
+            chars.append(ch)
+            counts.append(sum(1 for _ in group))
+    return "".join(chars), counts
+
+
+def normalize(text: str) -> str:
+    """Fold ``text`` into space-separated alphanumeric tokens (see module doc)."""
+    return REPEATS.sub(r"\1", " ".join(_glue(_tokens(_fold(text)))))
+
+
+class WordFilter:
+    """Aho-Corasick automaton over normalized banned words."""
+
+    def __init__(self, words):
+        self.words = sorted({w for w in words if w})
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # words ending here: (length, word, repeat counts or None if all 1)
+        self._out: list[list[tuple] | None] = [None]
+        for word in self.words:
+            pattern, counts = normalize_runs(word)
+            self._add(pattern, word, counts if any(c > 1 for c in counts) else None)
+        self._link()
+
+    def __len__(self):
+        return len(self.words)
+
+    def _add(self, pattern: str, word: str, counts: list[int] | None):
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            node = nxt
+        if self._out[node] is None:
+            self._out[node] = []
+        self._out[node].append((len(pattern), word, counts))
+
+    def _link(self):
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+        # dictionary links are folded into _out lazily in find()
+
+    def find(self, text: str) -> str | None:
+        """Return the first banned word found in ``text`` or None."""
+        if not self.words:
+            return None
+        norm = normalize(text)
+        runs = None  # repeat counts, only worked out if a word needs them
+        goto, fail, out = self._goto, self._fail, self._out
+        size = len(norm)
+        node = 0
+        for i, ch in enumerate(norm):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            # only whole tokens count, so a hit must end at a token boundary
+            if i + 1 < size and norm[i + 1] != " ":
+                continue
+            hit = node
+            while hit:
+                for length, word, counts in out[hit] or ():
+                    start = i + 1 - length
+                    if start and norm[start - 1] != " ":
+                        continue
+                    # "kuta" must not match "kutta": repeats may only grow
+                    if counts:
+                        if runs is None:
+                            runs = normalize_runs(text)[1]
+                        if any(runs[start + k] < c for k, c in enumerate(counts)):
+                            continue
+                    return word
+                hit = fail[hit]
+        return None
+
+
+class FilterRegistry:
+    """Per-guild word filters backed by a JSON file that is hot-reloaded.
+
+    File format::
+
+        {"default": ["word", ...], "guilds": {"<guild_id>": ["extra", ...]}}
+
+    A guild's filter is the default list plus its own extras. The file's
+    mtime is checked at most every ``check_every`` seconds and filters are
+    rebuilt lazily when it changes.
+    """
+
+    def __init__(self, default_words, path: str = "banned_words.json", check_every: float = 5.0):
+        self.path = path
+        self.check_every = check_every
+        self.default_words = list(default_words)
+        self.guild_words: dict[int, list[str]] = {}
+        self._filters: dict[int | None, WordFilter] = {}
+        self._mtime = None
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self) -> None:
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.default_words = data.get("default", self.default_words)
+            self.guild_words = {int(k): v for k, v in data.get("guilds", {}).items()}
+            self._mtime = os.path.getmtime(self.path)
+        self._filters.clear()
+
+    def save(self) -> None:
+        data = {
+            "default": self.default_words,
+            "guilds": {str(k): v for k, v in self.guild_words.items()},
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._mtime = os.path.getmtime(self.path)
+        self._filters.clear()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_every
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def for_guild(self, guild_id: int | None) -> WordFilter:
+        self._maybe_reload()
+        filt = self._filters.get(guild_id)
+        if filt is None:
+            words = self.default_words + self.guild_words.get(guild_id, [])
+            filt = self._filters[guild_id] = WordFilter(words)
+        return filt
+
+    def find(self, guild_id: int | None, text: str) -> str | None:
+        return self.for_guild(guild_id).find(text)
+
+    def add_words(self, guild_id: int, words) -> list[str]:
+        self.reload()  # another shard worker may have saved since our last check
+        current = self.guild_words.setdefault(guild_id, [])
+        added = [w for w in (w.strip().lower() for w in words) if w and w not in current]
+        current.extend(added)
+        self.save()
+        return added
+
+    def remove_words(self, guild_id: int, words) -> list[str]:
+        self.reload()
+        current = self.guild_words.get(guild_id, [])
+        removed = [w for w in (w.strip().lower() for w in words) if w in current]
+        self.guild_words[guild_id] = [w for w in current if w not in removed]
+        self.save()
+        return removed
@@ -0,0 +1,466 @@
+"""Persistence for the Levels cog.
+
+Levels used to rewrite all of ``levels.json`` on every message. The stores
+below take small batches of changed rows instead, and ``WriteBehind``
+coalesces updates in memory and flushes them on a timer or once enough
+updates are pending.
+
+A row is ``(guild_id, user_id, xp, last_daily_iso_or_None, roles_list)``.
+Data from before XP was split per guild is kept under ``LEGACY_GUILD``
+until the Levels cog hands it out to the guilds its users belong to.
+
+The SQLite store is ``shared``: several worker processes (see
+utils/sharding.py) can use one database. XP is written as increments
+(``xp = xp + gained``) and /daily is claimed in a transaction, so a
+process holding a stale copy of a row cannot undo another's writes.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from utils.metrics import registry
+
+LEGACY_FILE = "levels.json"
+LEGACY_GUILD = 0
+# rows built between event-loop yields when collecting state for compaction
+COMPACT_CHUNK = 5000
+# how long a writer waits for another process's transaction
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+
+def daily_iso(timestamp: float) -> str:
+    """Unix seconds -> the naive-UTC ISO string rows store for /daily."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def daily_timestamp(iso: str) -> float:
+    return datetime.fromisoformat(iso).replace(tzinfo=timezone.utc).timestamp()
+
+
+def atomic_write_json(path: str, data) -> None:
+    """Write JSON to ``path`` so readers only ever see the old or new file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_legacy_json(path: str = LEGACY_FILE) -> list[tuple]:
+    """Turn an old ``levels.json`` file into ``LEGACY_GUILD`` store rows."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    xp = {int(k): v for k, v in data.get("user_xp", {}).items()}
+    daily = {int(k): v for k, v in data.get("last_daily", {}).items()}
+    roles = {int(k): v for k, v in data.get("user_roles", {}).items()}
+    return [
+        (LEGACY_GUILD, uid, xp.get(uid, 0), daily.get(uid), roles.get(uid, []))
+        for uid in set(xp) | set(daily) | set(roles)
+    ]
+
+
+# ===== SQLite (WAL) backend =====
+class SQLiteStore:
+    shared = True
+    # compact() doesn't take the full state
+    needs_rows = False
+
+    def __init__(self, path: str = "levels.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                    timeout=BUSY_TIMEOUT_MS / 1000)
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS members ("
+            " guild_id INTEGER NOT NULL,"
+            " user_id INTEGER NOT NULL,"
+            " xp INTEGER NOT NULL DEFAULT 0,"
+            " last_daily TEXT,"
+            " roles TEXT NOT NULL DEFAULT '[]',"
+            " PRIMARY KEY (guild_id, user_id))"
+        )
+        # shards whose worker has copied the LEGACY_GUILD rows into its guilds
+        self.conn.execute("CREATE TABLE IF NOT EXISTS legacy_split (shard_id INTEGER PRIMARY KEY)")
+        self._migrate_flat_table()
+
+    def _migrate_flat_table(self):
+        # databases written before the per-guild split had a flat users table
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+        ).fetchone()
+        if not exists:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute(
+            "INSERT OR IGNORE INTO members (guild_id, user_id, xp, last_daily, roles) "
+            "SELECT ?, user_id, xp, last_daily, roles FROM users",
+            (LEGACY_GUILD,),
+        )
+        self.conn.execute("DROP TABLE users")
+        self.conn.execute("COMMIT")
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM members LIMIT 1").fetchone() is None
+
+    def load(self) -> list[tuple]:
+        with self._lock:
+            cur = self.conn.execute("SELECT guild_id, user_id, xp, last_daily, roles FROM members")
+            return [(gid, uid, xp, daily, json.loads(roles)) for gid, uid, xp, daily, roles in cur]
+
+    def write_batch(self, rows: list[tuple], gained: dict | None = None) -> None:
+        """Upsert ``rows``. With ``gained`` (``{(guild_id, user_id): xp}``)
+        XP is added to the stored value instead of replacing it; a row's
+        own xp is then ignored."""
+        if gained is None:
+            params = [(gid, uid, xp, daily, json.dumps(roles)) for gid, uid, xp, daily, roles in rows]
+            xp_update = "xp = excluded.xp"
+        else:
+            params = [(gid, uid, gained.get((gid, uid), 0), daily, json.dumps(roles))
+                      for gid, uid, _, daily, roles in rows]
+            xp_update = "xp = members.xp + excluded.xp"
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT INTO members (guild_id, user_id, xp, last_daily, roles) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    f"ON CONFLICT(guild_id, user_id) DO UPDATE SET {xp_update}, "
+                    # never move a /daily claim backwards
+                    "last_daily = COALESCE(MAX(members.last_daily, excluded.last_daily), "
+                    "members.last_daily, excluded.last_daily), "
+                    "roles = excluded.roles",
+                    params,
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def claim_daily(self, guild_id: int, user_id: int, now: float, cooldown: float, reward: int) -> float | None:
+        """Atomically claim /daily: if the last claim is at least ``cooldown``
+        seconds old, record ``now`` and add ``reward`` XP. Returns None on
+        success, otherwise the time of the claim still cooling down."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT last_daily FROM members WHERE guild_id = ? AND user_id = ?",
+                    (guild_id, user_id),
+                ).fetchone()
+                last = daily_timestamp(row[0]) if row and row[0] else None
+                if last is not None and now < last + cooldown:
+                    self.conn.execute("ROLLBACK")
+                    return last
+                self.conn.execute(
+                    "INSERT INTO members (guild_id, user_id, xp, last_daily) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(guild_id, user_id) DO UPDATE SET "
+                    "xp = members.xp + excluded.xp, last_daily = excluded.last_daily",
+                    (guild_id, user_id, reward, daily_iso(now)),
+                )
+                self.conn.execute("COMMIT")
+                return None
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def top_users(self, limit: int, offset: int = 0) -> list[tuple[int, int]]:
+        """``(user_id, total_xp)`` summed over every guild, highest first."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT user_id, SUM(xp) AS total FROM members WHERE guild_id != ? "
+                "GROUP BY user_id ORDER BY total DESC, user_id LIMIT ? OFFSET ?",
+                (LEGACY_GUILD, limit, offset),
+            ).fetchall()
+
+    def finish_legacy_split(self, shard_ids: list[int], shard_count: int) -> int:
+        """Record that ``shard_ids`` have copied the legacy rows into their
+        guilds. Once every shard has, legacy rows of users who now have a
+        guild row are deleted; users in no guild keep theirs. Returns the
+        number of rows deleted (0 while shards are still outstanding)."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany("INSERT OR IGNORE INTO legacy_split (shard_id) VALUES (?)",
+                                      [(i,) for i in shard_ids])
+                (done,) = self.conn.execute(
+                    "SELECT COUNT(*) FROM legacy_split WHERE shard_id < ?", (shard_count,)
+                ).fetchone()
+                deleted = 0
+                if done == shard_count:
+                    deleted = self.conn.execute(
+                        "DELETE FROM members WHERE guild_id = ? AND user_id IN "
+                        "(SELECT user_id FROM members WHERE guild_id != ?)",
+                        (LEGACY_GUILD, LEGACY_GUILD),
+                    ).rowcount
+                self.conn.execute("COMMIT")
+                return deleted
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def delete_batch(self, keys: list[tuple[int, int]]) -> None:
+        with self._lock:
+            self.conn.executemany("DELETE FROM members WHERE guild_id = ? AND user_id = ?", keys)
+
+    def compact(self, rows: list[tuple] | None = None) -> None:
+        # the table already holds everything; just fold the WAL back in
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def snapshot(self, dest: str) -> None:
+        """Copy a consistent image of the database to ``dest`` atomically."""
+        tmp = f"{dest}.tmp"
+        out = sqlite3.connect(tmp)
+        try:
+            with self._lock:
+                self.conn.backup(out)
+        finally:
+            out.close()
+        os.replace(tmp, dest)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+# ===== Append-only journal backend =====
+class JournalStore:
+    """JSON-lines journal of row updates plus a compacted JSON snapshot.
+
+    Replaying the snapshot and then the journal gives the current state. A
+    crash mid-append leaves a partial last line; opening the store cuts the
+    journal back to its last newline, so that row is lost but later appends
+    start on a fresh line. Any other line that doesn't parse is skipped on
+    load. A row with only a guild and user id is a tombstone.
+    Single-process only.
+    """
+
+    shared = False
+    # compact() rewrites the snapshot from the full state
+    needs_rows = True
+
+    def __init__(self, path: str = "levels.journal", snapshot_path: str = "levels.snapshot.json"):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._trim_torn_tail()
+        self._fh = open(path, "a")
+
+    def _trim_torn_tail(self, block: int = 4096) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = pos = size
+            while pos > 0:
+                step = min(block, pos)
+                pos -= step
+                f.seek(pos)
+                cut = f.read(step).rfind(b"\n")
+                if cut != -1:
+                    end = pos + cut + 1
+                    break
+            else:
+                end = 0
+            if end < size:
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+                print(f"⚠️ Dropped a torn {size - end}-byte row from the end of {self.path}")
+
+    def is_empty(self) -> bool:
+        return not os.path.exists(self.snapshot_path) and os.path.getsize(self.path) == 0
+
+    def load(self) -> list[tuple]:
+        state = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                for row in json.load(f):
+                    self._apply(state, row)
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._apply(state, row)
+        return list(state.values())
+
+    @staticmethod
+    def _apply(state, row):
+        if len(row) == 4:  # flat pre-guild row
+            row = [LEGACY_GUILD, *row]
+        if len(row) == 2:
+            state.pop(tuple(row), None)
+        else:
+            state[(row[0], row[1])] = tuple(row)
+
+    def write_batch(self, rows: list[tuple]) -> None:
+        payload = "".join(json.dumps(list(row)) + "\n" for row in rows)
+        with self._lock:
+            self._fh.write(payload)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def delete_batch(self, keys: list[tuple[int, int]]) -> None:
+        self.write_batch(keys)
+
+    def compact(self, rows: list[tuple]) -> None:
+        with self._lock:
+            atomic_write_json(self.snapshot_path, [list(row) for row in rows])
+            self._fh.close()
+            self._fh = open(self.path, "w")
+
+    def snapshot(self, dest: str) -> None:
+        atomic_write_json(dest, [list(row) for row in self.load()])
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+BACKENDS = {
+    "sqlite": SQLiteStore,
+    "journal": JournalStore,
+}
+
+
+def open_store(kind: str | None = None):
+    """Open the backend named by ``kind`` or the ``LEVELS_BACKEND`` env var."""
+    kind = (kind or os.getenv("LEVELS_BACKEND", "sqlite")).lower()
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown levels backend: {kind}")
+    return BACKENDS[kind]()
+
+
+def migrate_legacy(store, path: str = LEGACY_FILE) -> bool:
+    """Import an old ``levels.json`` into an empty store, once."""
+    if not os.path.exists(path) or not store.is_empty():
+        return False
+    store.write_batch(read_legacy_json(path))
+    os.replace(path, f"{path}.migrated")
+    print(f"📦 Migrated {path} into {type(store).__name__}")
+    return True
+
+
+# ===== Write-behind batching =====
+class WriteBehind:
+    """Coalesce row updates and flush them off the event loop.
+
+    ``row_for(key)`` builds the current row for a dirty ``(guild_id,
+    user_id)`` key, or returns None if the row was dropped, and
+    ``all_rows()`` yields the full state for compaction. It is only used
+    for stores with ``needs_rows`` and is consumed in chunks that yield to
+    the event loop, so it must tolerate state changing between rows.
+    Flushes happen every ``interval_ms`` or as soon as ``max_pending``
+    users are dirty.
+
+    ``gained`` is the owner's ``{key: xp}`` of XP added since the last
+    flush; flushed keys are taken out of it and, for a ``shared`` store,
+    written as increments.
+    """
+
+    def __init__(self, store, row_for, all_rows, interval_ms: int = 500,
+                 max_pending: int = 200, compact_every: float = 600.0,
+                 gained: dict | None = None):
+        self.store = store
+        self.row_for = row_for
+        self.all_rows = all_rows
+        self.gained = gained if gained is not None else {}
+        self.interval = interval_ms / 1000
+        self.max_pending = max_pending
+        self.compact_every = compact_every
+        self.dirty: set[tuple[int, int]] = set()
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._last_compact = time.monotonic()
+
+    def mark(self, key: tuple[int, int]) -> None:
+        self.dirty.add(key)
+        if len(self.dirty) >= self.max_pending:
+            self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_compact >= self.compact_every:
+                    await self.compact()
+            except Exception as e:
+                print(f"⚠️ Levels flush failed: {e}")
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self.dirty:
+                return
+            keys, self.dirty = self.dirty, set()
+            rows, dropped, gained = [], [], {}
+            for key in keys:
+                if key in self.gained:
+                    gained[key] = self.gained.pop(key)
+                row = self.row_for(key)
+                if row is None:
+                    dropped.append(key)
+                else:
+                    rows.append(row)
+            args = (rows, gained) if self.store.shared else (rows,)
+            # on failure keep them dirty (and their XP pending) so the next flush retries
+            try:
+                if rows:
+                    with registry.timer("levels.flush", f"{len(rows)} rows"):
+                        await asyncio.to_thread(self.store.write_batch, *args)
+            except Exception:
+                self.dirty |= keys
+                for key, xp in gained.items():
+                    self.gained[key] = self.gained.get(key, 0) + xp
+                raise
+            try:
+                if dropped:
+                    await asyncio.to_thread(self.store.delete_batch, dropped)
+            except Exception:
+                self.dirty.update(dropped)
+                raise
+
+    async def compact(self) -> None:
+        async with self._flush_lock:
+            rows = None
+            if self.store.needs_rows:
+                rows = []
+                for i, row in enumerate(self.all_rows(), 1):
+                    if row is not None:
+                        rows.append(row)
+                    if i % COMPACT_CHUNK == 0:
+                        await asyncio.sleep(0)
+            await asyncio.to_thread(self.store.compact, rows)
+            self._last_compact = time.monotonic()
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        await self.compact()
+        self.store.close()